@@ -0,0 +1,7 @@
+from vidur.cache.artifact_cache import (
+    ArtifactCache,
+    get_dataframe_digest,
+    get_file_digest,
+)
+
+__all__ = [ArtifactCache, get_dataframe_digest, get_file_digest]
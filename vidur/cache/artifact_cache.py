@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fasteners import InterProcessLock
+
+from vidur.logger import init_logger
+
+logger = init_logger(__name__)
+
+# bump whenever the on-disk layout or the key derivation changes
+CACHE_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_LOCK_FILE = "manifest.lock"
+OBJECTS_DIR = "objects"
+
+_DIGEST_BLOCK_SIZE = 1 << 20
+_STALE_TMP_FILE_AGE = 60 * 60
+
+# path -> (size, mtime_ns, digest), so every profiling file is hashed at most
+# once per process
+_file_digests: Dict[str, Tuple[int, int, str]] = {}
+
+
+def get_file_digest(path: str) -> str:
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+
+    cached = _file_digests.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_DIGEST_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    _file_digests[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def get_dataframe_digest(df: pd.DataFrame) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(column) for column in df.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content addressed store for derived artifacts (trained models, prediction
+    tables, normalized traces). Artifacts are keyed by the sha256 of everything
+    they are derived from, written atomically and tracked in a manifest that
+    records their size and digest. Lookups only read the manifest, the last
+    access time used for LRU eviction is the access time of the artifact file.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 0) -> None:
+        self._cache_dir = cache_dir
+        self._max_size_bytes = max_size_bytes
+
+        os.makedirs(f"{self._cache_dir}/{OBJECTS_DIR}", exist_ok=True)
+
+        self._manifest_file = f"{self._cache_dir}/{MANIFEST_FILE}"
+        self._lock = InterProcessLock(f"{self._cache_dir}/{MANIFEST_LOCK_FILE}")
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @staticmethod
+    def get_key(*parts: Any) -> str:
+        key_str = json.dumps(
+            [CACHE_VERSION, *parts], sort_keys=True, default=str, separators=(",", ":")
+        )
+        return hashlib.sha256(key_str.encode("utf-8")).hexdigest()
+
+    def _get_relative_path(self, key: str, suffix: str) -> str:
+        return f"{OBJECTS_DIR}/{key[:2]}/{key}{suffix}"
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self._manifest_file):
+            return {"version": CACHE_VERSION, "entries": {}}
+
+        with open(self._manifest_file) as f:
+            manifest = json.load(f)
+
+        if manifest.get("version") != CACHE_VERSION:
+            logger.warning(
+                f"Ignoring cache manifest with version {manifest.get('version')} in {self._cache_dir}"
+            )
+            return {"version": CACHE_VERSION, "entries": {}}
+
+        return manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp_file = f"{self._manifest_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self._manifest_file)
+
+    def _get_accessed_at(self, entry: Dict[str, Any]) -> float:
+        try:
+            return os.stat(f"{self._cache_dir}/{entry['path']}").st_atime
+        except FileNotFoundError:
+            return entry["created_at"]
+
+    def get_entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            entries = self._read_manifest()["entries"]
+
+        for entry in entries.values():
+            entry["accessed_at"] = self._get_accessed_at(entry)
+
+        return entries
+
+    def get_path(self, key: str) -> Optional[str]:
+        # the manifest is replaced atomically, so lookups need neither the lock
+        # nor a manifest write, missing files are dropped by gc
+        entry = self._read_manifest()["entries"].get(key)
+        if entry is None:
+            return
+
+        path = f"{self._cache_dir}/{entry['path']}"
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+
+        # the access time is set explicitly, file systems mounted with noatime
+        # or relatime do not keep it up to date on reads
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+
+        return path
+
+    def store(
+        self,
+        key: str,
+        name: str,
+        suffix: str,
+        write_fn: Callable[[str], None],
+    ) -> str:
+        relative_path = self._get_relative_path(key, suffix)
+        path = f"{self._cache_dir}/{relative_path}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temporary file first so that readers never see a partial
+        # artifact, the suffix is kept as some writers (np.save) append it
+        tmp_path = f"{path}.{os.getpid()}.tmp{suffix}"
+        write_fn(tmp_path)
+        digest = get_file_digest(tmp_path)
+        size = os.path.getsize(tmp_path)
+
+        with self._lock:
+            os.replace(tmp_path, path)
+            manifest = self._read_manifest()
+            manifest["entries"][key] = {
+                "name": name,
+                "path": relative_path,
+                "size": size,
+                "digest": digest,
+                "created_at": time.time(),
+            }
+            self._write_manifest(manifest)
+
+        if self._max_size_bytes:
+            self.gc(self._max_size_bytes)
+
+        return path
+
+    def load_pickle(self, key: str) -> Any:
+        path = self.get_path(key)
+        if path is None:
+            return
+
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (EOFError, ImportError, pickle.UnpicklingError):
+            logger.warning(f"Failed to load cached artifact {path}")
+            return
+
+    def store_pickle(self, key: str, name: str, obj: Any) -> str:
+        def write_fn(path: str) -> None:
+            with open(path, "wb") as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return self.store(key, name, ".pkl", write_fn)
+
+    def load_array(self, key: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+        path = self.get_path(key)
+        if path is None:
+            return
+
+        return np.load(path, mmap_mode=mmap_mode)
+
+    def store_array(self, key: str, name: str, array: np.ndarray) -> str:
+        return self.store(key, name, ".npy", lambda path: np.save(path, array))
+
+    def gc(self, max_size_bytes: int = 0) -> List[str]:
+        """
+        Drops entries whose file is missing, objects that are not tracked by the
+        manifest and, if `max_size_bytes` is set, the least recently accessed
+        entries until the cache fits. Returns the evicted keys.
+        """
+        evicted_keys = []
+
+        with self._lock:
+            manifest = self._read_manifest()
+            entries = manifest["entries"]
+
+            for key, entry in list(entries.items()):
+                if not os.path.exists(f"{self._cache_dir}/{entry['path']}"):
+                    del entries[key]
+                    evicted_keys.append(key)
+
+            tracked_paths = {entry["path"] for entry in entries.values()}
+            for relative_path in self._list_objects():
+                path = f"{self._cache_dir}/{relative_path}"
+                if relative_path in tracked_paths:
+                    continue
+                # temporary files may belong to a writer that is still running
+                if ".tmp" in relative_path and (
+                    time.time() - os.path.getmtime(path) < _STALE_TMP_FILE_AGE
+                ):
+                    continue
+                os.remove(path)
+
+            if max_size_bytes:
+                total_size = sum(entry["size"] for entry in entries.values())
+                for key, entry in sorted(
+                    entries.items(), key=lambda item: self._get_accessed_at(item[1])
+                ):
+                    if total_size <= max_size_bytes:
+                        break
+                    os.remove(f"{self._cache_dir}/{entry['path']}")
+                    total_size -= entry["size"]
+                    del entries[key]
+                    evicted_keys.append(key)
+
+            self._write_manifest(manifest)
+
+        if evicted_keys:
+            logger.info(
+                f"Evicted {len(evicted_keys)} artifacts from cache {self._cache_dir}"
+            )
+
+        return evicted_keys
+
+    def verify(self, remove_corrupt: bool = False) -> List[str]:
+        """
+        Recomputes the digest of every tracked artifact and returns the keys of
+        entries whose file is missing or does not match the manifest.
+        """
+        corrupt_keys = []
+
+        with self._lock:
+            manifest = self._read_manifest()
+            entries = manifest["entries"]
+
+            for key, entry in list(entries.items()):
+                path = f"{self._cache_dir}/{entry['path']}"
+                if os.path.exists(path) and get_file_digest(path) == entry["digest"]:
+                    continue
+
+                corrupt_keys.append(key)
+                if remove_corrupt:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    del entries[key]
+
+            if remove_corrupt and corrupt_keys:
+                self._write_manifest(manifest)
+
+        return corrupt_keys
+
+    def _list_objects(self) -> List[str]:
+        relative_paths = []
+        objects_dir = f"{self._cache_dir}/{OBJECTS_DIR}"
+
+        for root, _, files in os.walk(objects_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                relative_paths.append(os.path.relpath(path, self._cache_dir))
+
+        return relative_paths
@@ -0,0 +1,78 @@
+import argparse
+from datetime import datetime
+
+from vidur.cache.artifact_cache import ArtifactCache
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the cache")
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default="cache",
+        help="Cache directory",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("ls", help="List cached artifacts")
+
+    gc_parser = subparsers.add_parser(
+        "gc", help="Remove untracked artifacts and evict to a size limit"
+    )
+    gc_parser.add_argument(
+        "--max_size_mb",
+        type=float,
+        default=0,
+        help="Evict least recently used artifacts until the cache fits, 0 disables eviction",
+    )
+
+    verify_parser = subparsers.add_parser(
+        "verify", help="Check cached artifacts against their recorded digests"
+    )
+    verify_parser.add_argument(
+        "--remove_corrupt",
+        action="store_true",
+        help="Remove artifacts that fail verification",
+    )
+
+    return parser.parse_args()
+
+
+def list_artifacts(cache: ArtifactCache) -> None:
+    entries = cache.get_entries()
+
+    total_size = 0
+    for key, entry in sorted(
+        entries.items(), key=lambda item: item[1]["accessed_at"], reverse=True
+    ):
+        accessed_at = datetime.fromtimestamp(entry["accessed_at"])
+        print(
+            f"{key[:16]}  {entry['size'] / 2**20:10.2f} MB  "
+            f"{accessed_at:%Y-%m-%d %H:%M:%S}  {entry['name']}"
+        )
+        total_size += entry["size"]
+
+    print(f"{len(entries)} artifacts, {total_size / 2**20:.2f} MB")
+
+
+def main() -> None:
+    args = parse_args()
+
+    cache = ArtifactCache(args.cache_dir)
+
+    if args.command == "ls":
+        list_artifacts(cache)
+    elif args.command == "gc":
+        evicted_keys = cache.gc(int(args.max_size_mb * 2**20))
+        print(f"Evicted {len(evicted_keys)} artifacts")
+    elif args.command == "verify":
+        corrupt_keys = cache.verify(args.remove_corrupt)
+        for key in corrupt_keys:
+            print(f"Corrupt artifact {key}")
+        print(f"{len(corrupt_keys)} corrupt artifacts")
+        if corrupt_keys and not args.remove_corrupt:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
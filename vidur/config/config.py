@@ -246,6 +246,20 @@ class TraceRequestGeneratorConfig(BaseRequestGeneratorConfig):
         default=4096,
         metadata={"help": "Maximum tokens for the trace request generator."},
     )
+    chunk_size: int = field(
+        default=65536,
+        metadata={
+            "help": "Number of trace rows to read from the trace file at a time."
+        },
+    )
+    cache_dir: str = field(
+        default="cache",
+        metadata={"help": "Cache directory for the normalized trace columns."},
+    )
+    no_cache: bool = field(
+        default=False,
+        metadata={"help": "Whether to skip the normalized trace cache."},
+    )
 
     @staticmethod
     def get_type():
@@ -270,6 +284,12 @@ class BaseReplicaSchedulerConfig(BasePolyConfig):
         default=None,
         metadata={"help": "Number of blocks."},
     )
+    execution_time_cache_size: int = field(
+        default=4096,
+        metadata={
+            "help": "Size of the per stage LRU cache of batch execution times. 0 disables the cache."
+        },
+    )
 
 
 @dataclass
@@ -396,6 +416,42 @@ class MetricsConfig:
         default=False,
         metadata={"help": "Whether to keep individual batch metrics."},
     )
+    utilization_sample_interval: float = field(
+        default=0,
+        metadata={
+            "help": "Also write memory usage, busy time and MFU of every replica (stage) as time weighted means over intervals of this many seconds, 0 disables the time series."
+        },
+    )
+    defer_mfu: bool = field(
+        default=False,
+        metadata={
+            "help": "Compute the MFU of finished batch stages in bulk instead of on every stage schedule, ignored when utilization_sample_interval is set."
+        },
+    )
+    stream_completed_requests: bool = field(
+        default=False,
+        metadata={
+            "help": "Whether to append the record of every completed request to completed_requests.csv in bounded chunks."
+        },
+    )
+    spill_metrics: bool = field(
+        default=False,
+        metadata={
+            "help": "Whether to append metric data series to csv part files in output_dir/metrics_spill during the simulation instead of holding them in memory."
+        },
+    )
+    batch_metrics_max_samples: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": "Keep the per batch metrics of a uniform random sample of at most this many batches, chosen as the batches end. The batch and operation distributions still see every batch."
+        },
+    )
+    stratify_batch_metrics: bool = field(
+        default=False,
+        metadata={
+            "help": "Split the batch_metrics_max_samples sample evenly across replicas. The sample_weight column of the per batch csvs gives the number of batches each kept batch stands for."
+        },
+    )
     subsamples: Optional[int] = field(
         default=None,
         metadata={"help": "Subsamples."},
@@ -416,6 +472,12 @@ class MetricsConfig:
         default="cache",
         metadata={"help": "Cache directory."},
     )
+    cache_max_size_mb: float = field(
+        default=0,
+        metadata={
+            "help": "Evict least recently used cache artifacts beyond this size, 0 disables eviction."
+        },
+    )
 
     def __post_init__(self):
         self.output_dir = (
@@ -424,6 +486,56 @@ class MetricsConfig:
         os.makedirs(self.output_dir, exist_ok=True)
 
 
+@dataclass
+class SloConfig:
+    scheduling_delay_value: Optional[float] = field(
+        default=None,
+        metadata={"help": "Request scheduling delay SLO in seconds, None disables it."},
+    )
+    scheduling_delay_quantile: float = field(
+        default=0.99,
+        metadata={"help": "Quantile of the scheduling delay that must meet the SLO."},
+    )
+    ttft_value: Optional[float] = field(
+        default=None,
+        metadata={"help": "Time to first token SLO in seconds, None disables it."},
+    )
+    ttft_quantile: float = field(
+        default=0.99,
+        metadata={
+            "help": "Quantile of the time to first token that must meet the SLO."
+        },
+    )
+    tbt_value: Optional[float] = field(
+        default=None,
+        metadata={"help": "Time between tokens SLO in seconds, None disables it."},
+    )
+    tbt_quantile: float = field(
+        default=0.99,
+        metadata={
+            "help": "Quantile of the time between tokens that must meet the SLO."
+        },
+    )
+    early_stop: bool = field(
+        default=False,
+        metadata={
+            "help": "Terminate the simulation once the verdict on every SLO is certain."
+        },
+    )
+    confidence: Optional[float] = field(
+        default=None,
+        metadata={
+            "help": "Confidence needed to declare a violation statistically from the values seen so far, None only declares exact verdicts once all requests have arrived. The test treats the values as independent, which queueing delays are not, so bursts can trigger it on runs that meet the SLO."
+        },
+    )
+    min_samples: int = field(
+        default=100,
+        metadata={
+            "help": "Values of a metric to see before a violation can be declared statistically."
+        },
+    )
+
+
 @dataclass
 class ReplicaConfig:
     model_name: str = field(
@@ -576,6 +688,16 @@ class BaseExecutionTimePredictorConfig(BasePolyConfig):
         default=-1,
         metadata={"help": "Number of training job threads."},
     )
+    num_training_processes: int = field(
+        default=-1,
+        metadata={
+            "help": "Number of processes used to train models concurrently, -1 uses all cores."
+        },
+    )
+    prediction_chunk_size: int = field(
+        default=65536,
+        metadata={"help": "Number of prediction grid rows predicted per job."},
+    )
     skip_cpu_overhead_modeling: bool = field(
         default=True,
         metadata={"help": "Whether to skip CPU overhead modeling."},
@@ -709,6 +831,22 @@ class SimulationConfig(ABC):
         default=0,  # in seconds, 0 is no limit
         metadata={"help": "Time limit for simulation in seconds. 0 means no limit."},
     )
+    event_queue_type: str = field(
+        default="heap",
+        metadata={"help": "Event queue implementation, only heap is available."},
+    )
+    coalesce_schedule_events: bool = field(
+        default=False,
+        metadata={
+            "help": "Drain all arrivals within the schedule quantum in a single global schedule pass and drop duplicate replica schedule events."
+        },
+    )
+    schedule_quantum: float = field(
+        default=0,
+        metadata={
+            "help": "Global schedule quantum in seconds when coalescing schedule events, 0 only coalesces arrivals with the same timestamp."
+        },
+    )
     cluster_config: ClusterConfig = field(
         default_factory=ClusterConfig,
         metadata={"help": "Cluster config."},
@@ -725,6 +863,10 @@ class SimulationConfig(ABC):
         default_factory=MetricsConfig,
         metadata={"help": "Metrics config."},
     )
+    slo_config: SloConfig = field(
+        default_factory=SloConfig,
+        metadata={"help": "SLO config."},
+    )
 
     def __post_init__(self):
         logger.info("Initializing SimulationConfig")
@@ -735,9 +877,9 @@ class SimulationConfig(ABC):
         self.write_config_to_file()
 
     @classmethod
-    def create_from_cli_args(cls):
+    def create_from_cli_args(cls, cli_args: Optional[List[str]] = None):
         logger.info("Creating SimulationConfig from CLI args")
-        flat_config = create_flat_dataclass(cls).create_from_cli_args()
+        flat_config = create_flat_dataclass(cls).create_from_cli_args(cli_args)
         instance = flat_config.reconstruct_original_dataclass()
         instance.__flat_config__ = flat_config
         
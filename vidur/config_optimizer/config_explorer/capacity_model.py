@@ -0,0 +1,125 @@
+import glob
+import json
+import math
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from vidur.config_optimizer.config_explorer.config import JobConfig
+
+
+def get_search_results_dir(output_dir: str) -> str:
+    return f"{output_dir}/search_results"
+
+
+def get_slo_key(slo_value: float, slo_quantile: float) -> str:
+    # capacities are only comparable under the same scheduling delay slo
+    return f"sd{slo_value}_q{slo_quantile}"
+
+
+def get_features(job_config: JobConfig) -> List[float]:
+    return [
+        math.log2(job_config.num_tensor_parallel_workers),
+        math.log2(job_config.num_pipeline_stages),
+        math.log2(job_config.batch_size),
+    ]
+
+
+class CapacityModel:
+    """
+    Predicts the capacity of a job from the capacities already found for the
+    jobs of its family, see `JobConfig.get_family_key`, under the same
+    scheduling delay SLO. The capacity per
+    replica is fitted in log space, by ridge regression on the log2 of the
+    tensor parallel degree, the pipeline stages and the batch size. The ridge
+    term keeps the fit sensible with few results: a single result predicts its
+    own capacity per replica.
+    """
+
+    def __init__(self, job_config: JobConfig, slo_key: str, ridge: float = 0.1):
+        self._job_config = job_config
+        self._slo_key = slo_key
+        self._ridge = ridge
+        self._features = []
+        self._targets = []
+        self.source_job_hashes = []
+
+    def add(
+        self, job_hash: str, features: List[float], max_qps: float, num_replicas: int
+    ):
+        self._features.append(features)
+        self._targets.append(math.log(max_qps / num_replicas))
+        self.source_job_hashes.append(job_hash)
+
+    def load(self, output_dir: str) -> None:
+        family_key = self._job_config.get_family_key()
+        job_hash = self._job_config.get_hash()
+
+        for result_file in sorted(
+            glob.glob(f"{get_search_results_dir(output_dir)}/*.json")
+        ):
+            with open(result_file) as f:
+                result = json.load(f)
+
+            if (
+                result["family_key"] != family_key
+                or result["slo_key"] != self._slo_key
+                or result["job_hash"] == job_hash
+                or not result["max_qps_under_sla"]
+            ):
+                continue
+
+            self.add(
+                result["job_hash"],
+                result["features"],
+                result["max_qps_under_sla"],
+                result["num_replicas"],
+            )
+
+    def predict(self) -> Optional[float]:
+        if not self._targets:
+            return None
+
+        x = np.array(self._features)
+        y = np.array(self._targets)
+        x_mean = x.mean(axis=0)
+        y_mean = y.mean()
+        x_centered = x - x_mean
+
+        coefficients = np.linalg.solve(
+            x_centered.T @ x_centered + self._ridge * np.eye(x.shape[1]),
+            x_centered.T @ (y - y_mean),
+        )
+        log_qps_per_replica = (
+            y_mean + (np.array(get_features(self._job_config)) - x_mean) @ coefficients
+        )
+
+        return float(np.exp(log_qps_per_replica)) * self._job_config.num_replicas
+
+    @staticmethod
+    def store_result(
+        output_dir: str,
+        job_config: JobConfig,
+        slo_key: str,
+        max_qps_under_sla: Optional[float],
+    ) -> None:
+        results_dir = get_search_results_dir(output_dir)
+        os.makedirs(results_dir, exist_ok=True)
+
+        # written to a temporary file first, searches running in parallel may
+        # read the directory at any time
+        result_file = f"{results_dir}/{job_config.get_hash()}_{slo_key}.json"
+        with open(f"{result_file}.tmp", "w") as f:
+            json.dump(
+                {
+                    "job_hash": job_config.get_hash(),
+                    "family_key": job_config.get_family_key(),
+                    "slo_key": slo_key,
+                    "features": get_features(job_config),
+                    "num_replicas": job_config.num_replicas,
+                    "max_qps_under_sla": max_qps_under_sla,
+                },
+                f,
+            )
+        os.replace(f"{result_file}.tmp", result_file)
@@ -1,19 +1,28 @@
 import argparse
 import glob
+import json
 import os
 import platform
 import shlex
 from subprocess import Popen
+from typing import Optional, Tuple
 
 import pandas as pd
 import ray
 
+from vidur.config import SimulationConfig as VidurSimulationConfig
+from vidur.config_optimizer.config_explorer.capacity_model import (
+    CapacityModel,
+    get_slo_key,
+)
 from vidur.config_optimizer.config_explorer.config import JobConfig, SimulationConfig
 from vidur.config_optimizer.config_explorer.ray_utils import (
     CpuAssignmentManager,
     get_ip,
 )
 from vidur.logger import init_logger
+from vidur.metrics.cdf_sketch import get_quantile_key
+from vidur.simulation_runner import run_simulation
 
 logger = init_logger(__name__)
 
@@ -32,6 +41,8 @@ class CapacitySearch:
         self.args = args
         self.cpu_core_assignment_manager = cpu_core_assignment_manager
         self.cpu_core_id = cpu_core_id
+        # qps, verdict, scheduling delay and whether an earlier run was reused
+        self.probes = []
 
     def release_cpu_core_id(self):
         if self.cpu_core_id is None:
@@ -57,33 +68,132 @@ class CapacitySearch:
 
         return command
 
-    def _get_result_file(self, run_dir: str) -> str:
+    def _run_in_process(
+        self, simulator_config: SimulationConfig
+    ) -> Tuple[Optional[float], Optional[bool]]:
+        cli_args = shlex.split(simulator_config.to_args())
+        try:
+            config = VidurSimulationConfig.create_from_cli_args(cli_args)
+        except SystemExit:
+            # argparse exits on invalid arguments, which must not take the
+            # search worker down with it
+            raise ValueError(f"Invalid simulation arguments: {cli_args}")
+
+        original_cpu_affinity = None
+        if self.cpu_core_id is not None and platform.system() != "Darwin":
+            original_cpu_affinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {self.cpu_core_id})
+
+        try:
+            result = run_simulation(
+                config,
+                write_output=False,
+                quantiles=[self.args.scheduling_delay_slo_quantile],
+            )
+        finally:
+            if original_cpu_affinity is not None:
+                os.sched_setaffinity(0, original_cpu_affinity)
+
+        scheduling_delay = result.get_quantile(
+            "request_scheduling_delay", self.args.scheduling_delay_slo_quantile
+        )
+        return scheduling_delay, result.slo_verdict
+
+    def _run_in_subprocess(
+        self, simulator_config: SimulationConfig
+    ) -> Tuple[Optional[float], Optional[bool]]:
+        run_dir = simulator_config.get_run_dir()
+        command = self._generate_run_command(simulator_config)
+
+        output_file = open(f"{run_dir}/output.log", "w")
+
+        # write command to a file
+        output_file.write(f"Running command: {command}\n")
+
+        args = shlex.split(command)
+        p = Popen(args, stdout=output_file, stderr=output_file)
+        p.wait()
+
+        return self._get_result(run_dir)
+
+    def _is_same_slo(self, slo: dict) -> bool:
+        target = slo["targets"].get("request_scheduling_delay", {})
+        return (
+            target.get("value") == self.args.scheduling_delay_slo_value
+            and target.get("quantile") == self.args.scheduling_delay_slo_quantile
+        )
+
+    def _get_result(self, run_dir: str) -> Tuple[Optional[float], Optional[bool]]:
+        """
+        Returns the scheduling delay quantile and the SLO verdict of the run, if
+        the simulation reached one.
+        """
+        # prefer summary.json, which holds the exact scheduling delay quantiles,
+        # the per request csv is read for runs that predate it or whose summary
+        # lacks the slo quantile
+        quantile_key = get_quantile_key(self.args.scheduling_delay_slo_quantile)
+        is_stopped_for_other_slo = False
+        for summary_file in glob.glob(f"{run_dir}/*/summary.json"):
+            with open(summary_file) as f:
+                summary = json.load(f)
+
+            slo_verdict = summary.get("slo", {}).get("verdict")
+            # the run may have been stopped early for a different slo, its
+            # metrics then only cover part of the requests
+            if slo_verdict is not None and not self._is_same_slo(summary["slo"]):
+                is_stopped_for_other_slo = True
+                continue
+
+            if quantile_key in summary.get("request_scheduling_delay", {}):
+                return summary["request_scheduling_delay"][quantile_key], slo_verdict
+
         scheduling_delay_file = glob.glob(
             f"{run_dir}/*/plots/request_scheduling_delay.csv"
         )
-        if len(scheduling_delay_file) == 0:
-            return
+        if is_stopped_for_other_slo or len(scheduling_delay_file) == 0:
+            return None, None
 
-        return scheduling_delay_file[0]
+        scheduling_delay_df = pd.read_csv(scheduling_delay_file[0])
+        scheduling_delay = scheduling_delay_df["request_scheduling_delay"].quantile(
+            self.args.scheduling_delay_slo_quantile
+        )
+        return scheduling_delay, None
 
     def _is_under_sla(
         self,
-        result_file: str,
+        scheduling_delay: float,
+        slo_verdict: Optional[bool],
         simulator_config: SimulationConfig,
     ) -> tuple[bool, float]:
-        scheduling_delay_df = pd.read_csv(result_file)
-        scheduling_delay = scheduling_delay_df["request_scheduling_delay"].quantile(
-            self.args.scheduling_delay_slo_quantile
-        )
-        is_under_scheduling_delay_sla = (
-            scheduling_delay <= self.args.scheduling_delay_slo_value
-        )
+        # a run stopped early only has a partial quantile, its verdict decides
+        if slo_verdict is not None:
+            is_under_scheduling_delay_sla = slo_verdict
+        else:
+            is_under_scheduling_delay_sla = (
+                scheduling_delay <= self.args.scheduling_delay_slo_value
+            )
 
         logger.info(
             f"{simulator_config.to_human_readable_name()} - Scheduling delay (P{self.args.scheduling_delay_slo_quantile}): {scheduling_delay}",
         )
         return is_under_scheduling_delay_sla, scheduling_delay
 
+    def _add_probe(
+        self,
+        qps: float,
+        is_under_sla: bool,
+        scheduling_delay: float,
+        is_reused: bool,
+    ) -> None:
+        self.probes.append(
+            {
+                "qps": qps,
+                "is_under_sla": is_under_sla,
+                "scheduling_delay": scheduling_delay,
+                "is_reused": is_reused,
+            }
+        )
+
     def is_under_sla(self, qps: float) -> tuple[bool, float]:
         simulator_config = SimulationConfig(
             output_dir=self.args.output_dir,
@@ -91,31 +201,36 @@ class CapacitySearch:
             qps=qps,
             time_limit=self.args.time_limit,
             job_config=self.job_config,
+            scheduling_delay_slo_value=self.args.scheduling_delay_slo_value,
+            scheduling_delay_slo_quantile=self.args.scheduling_delay_slo_quantile,
+            early_stop_on_slo=not self.args.no_slo_early_stop,
         )
         run_dir = simulator_config.get_run_dir()
         os.makedirs(run_dir, exist_ok=True)
 
-        cached_result_file = self._get_result_file(run_dir)
-        if cached_result_file:
-            return self._is_under_sla(cached_result_file, simulator_config)
-
-        command = self._generate_run_command(simulator_config)
-
-        output_file = open(f"{run_dir}/output.log", "w")
-
-        # write command to a file
-        output_file.write(f"Running command: {command}\n")
+        cached_scheduling_delay, cached_slo_verdict = self._get_result(run_dir)
+        if cached_scheduling_delay is not None:
+            is_under_sla, scheduling_delay = self._is_under_sla(
+                cached_scheduling_delay, cached_slo_verdict, simulator_config
+            )
+            self._add_probe(qps, is_under_sla, scheduling_delay, is_reused=True)
+            return is_under_sla, scheduling_delay
 
         try:
-            args = shlex.split(command)
-            p = Popen(args, stdout=output_file, stderr=output_file)
-            p.wait()
-
-            result_file = self._get_result_file(run_dir)
+            if self.args.run_in_subprocess:
+                scheduling_delay, slo_verdict = self._run_in_subprocess(
+                    simulator_config
+                )
+            else:
+                scheduling_delay, slo_verdict = self._run_in_process(simulator_config)
             assert (
-                result_file is not None
+                scheduling_delay is not None
             ), f"Result file not found for {simulator_config.to_human_readable_name()}"
-            return self._is_under_sla(result_file, simulator_config)
+            is_under_sla, scheduling_delay = self._is_under_sla(
+                scheduling_delay, slo_verdict, simulator_config
+            )
+            self._add_probe(qps, is_under_sla, scheduling_delay, is_reused=False)
+            return is_under_sla, scheduling_delay
         except Exception as e:
             logger.error(
                 f"Error running: {self.job_config.get_human_readable_name()}, failed with error: {e}",
@@ -136,7 +251,47 @@ class CapacitySearch:
         max_qps_under_sla = None
         min_qps_over_sla = 2**32
 
-        for _ in range(self.args.max_iterations):
+        num_iterations = 0
+        seed_qps = None
+        slo_key = get_slo_key(
+            self.args.scheduling_delay_slo_value,
+            self.args.scheduling_delay_slo_quantile,
+        )
+        capacity_model = CapacityModel(self.job_config, slo_key)
+        if self.args.warm_start:
+            capacity_model.load(self.args.output_dir)
+            seed_qps = capacity_model.predict()
+
+        if seed_qps is not None:
+            # probe the predicted capacity and then the end of the bracket
+            # around it that can contain the capacity, if the capacity is not
+            # in the bracket the usual search continues from there
+            logger.info(
+                f"Warm starting search for {self.job_config.get_human_readable_name()} at QPS {seed_qps}",
+            )
+            next_qps = seed_qps
+            while next_qps is not None and num_iterations < 2:
+                qps = next_qps
+                next_qps = None
+                num_iterations += 1
+
+                is_under_sla, scheduling_delay = self.is_under_sla(qps)
+                if scheduling_delay is None:
+                    break
+
+                if is_under_sla:
+                    max_qps_under_sla = qps
+                    left = qps
+                    right = min(qps * 2, min_qps_over_sla)
+                    if min_qps_over_sla == 2**32:
+                        next_qps = seed_qps * (1 + self.args.warm_start_margin)
+                else:
+                    min_qps_over_sla = qps
+                    right = qps
+                    if max_qps_under_sla is None:
+                        next_qps = seed_qps * (1 - self.args.warm_start_margin)
+
+        for _ in range(self.args.max_iterations - num_iterations):
             # stopping condition - we have reached the minimum granularity
             if abs(left - right) < self.args.min_search_granularity * qps / 100:
                 break
@@ -176,7 +331,17 @@ class CapacitySearch:
 
         self.release_cpu_core_id()
 
+        if self.args.warm_start:
+            # only recorded for warm starts, the single probe cache warmup
+            # searches must not seed the real ones
+            CapacityModel.store_result(
+                self.args.output_dir, self.job_config, slo_key, max_qps_under_sla
+            )
+
         return {
             **self.job_config.to_config_dict(),
             "max_qps_under_sla": max_qps_under_sla,
+            "seed_qps": seed_qps,
+            "seed_job_hashes": capacity_model.source_job_hashes,
+            "probes": self.probes,
         }
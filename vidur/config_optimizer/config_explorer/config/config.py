@@ -1,3 +1,4 @@
+import copy
 import hashlib
 from dataclasses import dataclass
 from itertools import product
@@ -142,6 +143,23 @@ class JobConfig:
     def get_hash(self):
         return hashlib.sha1(self.get_key().encode("utf-8")).hexdigest()[:8]
 
+    def get_family_key(self):
+        # jobs that only differ in their parallelism and batch size
+        return (
+            f"{self.model_config.name}_{self.trace_config.get_key()}_{self.cluster_config.get_key()}"
+            f"_{self.scheduler_config.get_key()}"
+        )
+
+    def get_num_gpus(self):
+        return self.num_replicas * self.num_workers
+
+    def with_num_requests(self, num_requests: int):
+        # same job on a truncated trace, the request count is part of the key
+        job_config = copy.copy(self)
+        job_config.trace_config = copy.copy(self.trace_config)
+        job_config.trace_config.num_requests = num_requests
+        return job_config
+
     def to_config_dict(self):
         return {
             **self.model_config.to_config_dict(),
@@ -235,9 +253,12 @@ class SimulationConfig:
     qps: float
     time_limit: int
     job_config: JobConfig
+    scheduling_delay_slo_value: Optional[float] = None
+    scheduling_delay_slo_quantile: float = 0.99
+    early_stop_on_slo: bool = False
 
     def to_config_dict(self):
-        return {
+        config_dict = {
             **self.job_config.to_config_dict(),
             "metrics_config_output_dir": self.get_run_dir(),
             "metrics_config_cache_dir": self.cache_dir,
@@ -253,6 +274,18 @@ class SimulationConfig:
             "random_forrest_execution_time_predictor_config_skip_cpu_overhead_modeling": None,
         }
 
+        if self.scheduling_delay_slo_value is not None:
+            config_dict["slo_config_scheduling_delay_value"] = (
+                self.scheduling_delay_slo_value
+            )
+            config_dict["slo_config_scheduling_delay_quantile"] = (
+                self.scheduling_delay_slo_quantile
+            )
+        if self.early_stop_on_slo:
+            config_dict["slo_config_early_stop"] = None
+
+        return config_dict
+
     def to_args(self):
         args = []
 
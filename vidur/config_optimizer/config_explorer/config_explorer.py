@@ -1,15 +1,24 @@
 import argparse
 import copy
+from functools import partial
+from itertools import zip_longest
+from typing import List
 
 import ray
 
 from vidur.config_optimizer.config_explorer.capacity_search import CapacitySearch
 from vidur.config_optimizer.config_explorer.config import JobConfig
+from vidur.config_optimizer.config_explorer.process_pool_utils import (
+    ProcessPoolParallelRunner,
+)
 from vidur.config_optimizer.config_explorer.ray_utils import (
     CpuAssignmentManager,
     RayParallelRunner,
     run_on_each_node,
 )
+from vidur.logger import init_logger
+
+logger = init_logger(__name__)
 
 
 def run_search(
@@ -36,13 +45,25 @@ class ConfigExplorer:
         self.args = args
         self.config = config
 
-        ray.init(ignore_reinit_error=True)
+        if self.args.backend == "ray":
+            ray.init(ignore_reinit_error=True)
+            self._process_pool_runner = None
+        else:
+            self._process_pool_runner = ProcessPoolParallelRunner(self.args.num_threads)
 
     def _warmup_cache(self):
         job_configs = JobConfig.generate_unique_model_job_configs(self.config)
 
         args_for_warmup = copy.deepcopy(self.args)
         args_for_warmup.max_iterations = 1
+        args_for_warmup.warm_start = False
+
+        if self._process_pool_runner is not None:
+            # a single node, the warmups of different models can run together
+            self._process_pool_runner.map(
+                partial(run_search, args=args_for_warmup), job_configs
+            )
+            return
 
         for job_config in job_configs:
             all_node_results = run_on_each_node(
@@ -54,11 +75,59 @@ class ConfigExplorer:
                 all_node_results
             ), "All nodes should have the same result"
 
-    def run(self):
-        if not self.args.skip_cache_warmup:
-            self._warmup_cache()
+    def _get_search_order(self, job_configs: List[JobConfig]) -> List[int]:
+        """
+        Orders the jobs so that the jobs of a family, which differ only in
+        their parallelism and batch size, run one after the other from the
+        smallest to the largest. Families are interleaved, so that the searches
+        running in parallel warm start from the results of their neighbours.
+        """
+        families = {}
+        for i, job_config in enumerate(job_configs):
+            families.setdefault(job_config.get_family_key(), []).append(i)
 
-        job_configs = JobConfig.generate_job_configs(self.config)
+        for indices in families.values():
+            indices.sort(
+                key=lambda i: (
+                    job_configs[i].num_pipeline_stages,
+                    job_configs[i].num_tensor_parallel_workers,
+                    job_configs[i].batch_size,
+                )
+            )
+
+        return [
+            i
+            for indices in zip_longest(*families.values())
+            for i in indices
+            if i is not None
+        ]
+
+    def _run_searches(self, job_configs: List[JobConfig]) -> List[dict]:
+        search_order = self._get_search_order(job_configs)
+        ordered_results = self._map_searches([job_configs[i] for i in search_order])
+
+        all_results = [None] * len(job_configs)
+        for i, result in zip(search_order, ordered_results):
+            all_results[i] = result
+
+        num_probes = sum(len(result["probes"]) for result in all_results)
+        num_simulations = sum(
+            not probe["is_reused"]
+            for result in all_results
+            for probe in result["probes"]
+        )
+        logger.info(
+            f"Searched {len(all_results)} jobs with {num_probes} probes, "
+            f"{num_simulations} of them simulated"
+        )
+
+        return all_results
+
+    def _map_searches(self, job_configs: List[JobConfig]) -> List[dict]:
+        if self._process_pool_runner is not None:
+            return self._process_pool_runner.map(
+                partial(run_search, args=self.args), job_configs
+            )
 
         ray_parallel_runner = RayParallelRunner()
 
@@ -75,3 +144,18 @@ class ConfigExplorer:
             job_configs,
         )
         return all_results
+
+    def _shutdown(self):
+        if self._process_pool_runner is not None:
+            self._process_pool_runner.shutdown()
+
+    def run(self):
+        try:
+            if not self.args.skip_cache_warmup:
+                self._warmup_cache()
+
+            job_configs = JobConfig.generate_job_configs(self.config)
+
+            return self._run_searches(job_configs)
+        finally:
+            self._shutdown()
@@ -15,6 +15,9 @@ import time
 import yaml
 
 from vidur.config_optimizer.config_explorer.config_explorer import ConfigExplorer
+from vidur.config_optimizer.config_explorer.successive_halving_explorer import (
+    SuccessiveHalvingExplorer,
+)
 from vidur.logger import init_logger
 
 logger = init_logger(__name__)
@@ -40,6 +43,47 @@ def get_args():
     )
     parser.add_argument("--debug", action="store_true")
     parser.add_argument("--skip-cache-warmup", action="store_true")
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="ray",
+        choices=["ray", "process_pool"],
+        help="Run the searches on a ray cluster or on a local pool of --num-threads processes",
+    )
+    parser.add_argument(
+        "--run-in-subprocess",
+        action="store_true",
+        help="Run every probe with python -m vidur.main instead of in the search worker",
+    )
+    parser.add_argument(
+        "--no-slo-early-stop",
+        action="store_true",
+        help="Run every probe to completion instead of stopping once the SLO verdict is certain",
+    )
+    parser.add_argument(
+        "--warm-start",
+        action="store_true",
+        help="Start every search around the capacity predicted from the related configs already searched, the results then depend on the order in which the searches finish",
+    )
+    parser.add_argument(
+        "--warm-start-margin",
+        type=float,
+        default=0.15,
+        help="Relative half width of the warm started search bracket",
+    )
+    parser.add_argument(
+        "--successive-halving",
+        action="store_true",
+        help="Search every config on truncated traces first and only run the non-dominated ones on the full trace",
+    )
+    parser.add_argument("--reduction-factor", type=int, default=3)
+    parser.add_argument("--num-rungs", type=int, default=3)
+    parser.add_argument(
+        "--min-rung-requests",
+        type=int,
+        default=500,
+        help="Minimum number of requests in the truncated traces",
+    )
 
     args = parser.parse_args()
 
@@ -61,6 +105,7 @@ if __name__ == "__main__":
         args.scheduling_delay_slo_quantile >= 0
         and args.scheduling_delay_slo_quantile <= 1
     )
+    assert args.reduction_factor > 1 and args.num_rungs > 0
 
     os.makedirs(args.output_dir, exist_ok=True)
 
@@ -72,7 +117,10 @@ if __name__ == "__main__":
     json.dump(vars(args), open(f"{args.output_dir}/args.json", "w"))
     json.dump(config, open(f"{args.output_dir}/config.json", "w"))
 
-    multiple_capacity_search = ConfigExplorer(args, config)
+    if args.successive_halving:
+        multiple_capacity_search = SuccessiveHalvingExplorer(args, config)
+    else:
+        multiple_capacity_search = ConfigExplorer(args, config)
 
     start_time = time.time()
 
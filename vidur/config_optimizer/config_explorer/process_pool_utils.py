@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import platform
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from vidur.logger import init_logger
+
+logger = init_logger(__name__)
+
+
+def get_cpu_core_ids_available() -> List[int]:
+    # cpu affinity is not supported on macos, all the cores are usable
+    if platform.system() == "Darwin":
+        return list(range(os.cpu_count()))
+
+    return sorted(os.sched_getaffinity(0))
+
+
+def get_cpu_core_ids(num_workers: int) -> List[Optional[int]]:
+    # cpu affinity is not supported on macos, the workers are left unpinned
+    if platform.system() == "Darwin":
+        return [None] * num_workers
+
+    cpu_core_ids = get_cpu_core_ids_available()
+    assert num_workers <= len(cpu_core_ids), "Every worker needs its own core"
+    return cpu_core_ids[:num_workers]
+
+
+def _pin_worker(cpu_core_id_queue: multiprocessing.Queue) -> None:
+    # every worker takes one core for its lifetime, the simulations it runs in
+    # process and the subprocesses it starts all inherit the affinity
+    cpu_core_id = cpu_core_id_queue.get()
+    if cpu_core_id is not None:
+        os.sched_setaffinity(0, {cpu_core_id})
+
+
+class ProcessPoolParallelRunner:
+    """
+    Single node alternative to `RayParallelRunner`. Every worker process is
+    pinned to its own core and pulls the next task from the shared queue as
+    soon as it is done with the previous one, so no core idles while tasks
+    are left and no task waits for a core to be polled free. The workers are
+    kept across `map` calls so that they reuse the execution time predictors
+    they have already loaded.
+    """
+
+    def __init__(self, num_workers: int):
+        num_cpu_cores = len(get_cpu_core_ids_available())
+        if num_workers > num_cpu_cores:
+            # more workers than cores would pin several workers to one core
+            logger.warning(
+                f"Requested {num_workers} workers but only {num_cpu_cores} cores "
+                f"are available, using {num_cpu_cores} workers"
+            )
+            num_workers = num_cpu_cores
+
+        self._num_workers = num_workers
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is not None:
+            return self._executor
+
+        cpu_core_id_queue = multiprocessing.Queue()
+        for cpu_core_id in get_cpu_core_ids(self._num_workers):
+            cpu_core_id_queue.put(cpu_core_id)
+
+        logger.info(f"Starting process pool with {self._num_workers} workers")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._num_workers,
+            initializer=_pin_worker,
+            initargs=(cpu_core_id_queue,),
+        )
+        return self._executor
+
+    def map(self, func: Callable, collection: Iterable) -> list:
+        # one task per chunk, an idle worker always takes the next pending task
+        return list(self._get_executor().map(func, collection, chunksize=1))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
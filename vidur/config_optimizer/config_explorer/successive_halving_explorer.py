@@ -0,0 +1,162 @@
+import glob
+import json
+import math
+from typing import Dict, List, Optional, Tuple
+
+from vidur.config_optimizer.analyzer.constants import GPU_COSTS
+from vidur.config_optimizer.config_explorer.config import JobConfig, SimulationConfig
+from vidur.config_optimizer.config_explorer.config_explorer import ConfigExplorer
+from vidur.logger import init_logger
+
+logger = init_logger(__name__)
+
+# latency objectives of the pareto curves, as (summary metric, quantile key)
+TTFT_OBJECTIVE = ("prefill_e2e_time", "p90")
+TBT_OBJECTIVE = ("batch_execution_time", "p99")
+
+
+def get_pareto_layers(objectives: List[Tuple[float, ...]]) -> List[List[int]]:
+    """
+    Splits the points into successive non-dominated layers, every objective
+    is minimized. Returns the point indices of each layer, best layer first.
+    """
+    remaining = list(range(len(objectives)))
+    layers = []
+
+    while remaining:
+        layer = [
+            i
+            for i in remaining
+            if not any(
+                all(a <= b for a, b in zip(objectives[j], objectives[i]))
+                and objectives[j] != objectives[i]
+                for j in remaining
+            )
+        ]
+        layers.append(layer)
+        remaining = [i for i in remaining if i not in layer]
+
+    return layers
+
+
+class SuccessiveHalvingExplorer(ConfigExplorer):
+    """
+    Runs the capacity search of every job on a truncated trace first and only
+    promotes the most promising jobs to longer traces. Rung `i` of `n` uses
+    `1 / reduction_factor ** (n - 1 - i)` of the trace requests. After every
+    rung but the last, at least `1 / reduction_factor` of the jobs of each
+    (model, trace) pair are kept, taking whole pareto layers of capacity per
+    dollar, TTFT and TBT so that the estimated frontier always survives.
+    """
+
+    def _get_rung_num_requests(self, num_requests: int, rung: int) -> int:
+        num_rungs = self.args.num_rungs
+        scale = self.args.reduction_factor ** (num_rungs - 1 - rung)
+        return min(
+            num_requests, max(num_requests // scale, self.args.min_rung_requests)
+        )
+
+    def _get_latency(
+        self, job_config: JobConfig, qps: float, objective: Tuple[str, str]
+    ) -> Optional[float]:
+        simulator_config = SimulationConfig(
+            output_dir=self.args.output_dir,
+            cache_dir=self.args.cache_dir,
+            qps=qps,
+            time_limit=self.args.time_limit,
+            job_config=job_config,
+        )
+        metric_name, quantile_key = objective
+        for summary_file in glob.glob(
+            f"{simulator_config.get_run_dir()}/*/summary.json"
+        ):
+            with open(summary_file) as f:
+                summary = json.load(f)
+            if quantile_key in summary.get(metric_name, {}):
+                return summary[metric_name][quantile_key]
+
+    def _get_objectives(
+        self, job_config: JobConfig, result: dict
+    ) -> Tuple[float, float, float]:
+        # capacity per dollar as in the analyzer, negated to be minimized
+        max_qps = result["max_qps_under_sla"]
+        gpu_cost = GPU_COSTS.get(job_config.cluster_config.device)
+        if not max_qps:
+            return (0, math.inf, math.inf)
+        if gpu_cost is None:
+            # no price to compare with, keep the job around
+            return (-math.inf, 0, 0)
+
+        capacity_per_dollar = max_qps / (job_config.get_num_gpus() * gpu_cost)
+        ttft = self._get_latency(job_config, max_qps, TTFT_OBJECTIVE)
+        tbt = self._get_latency(job_config, max_qps, TBT_OBJECTIVE)
+
+        return (
+            -capacity_per_dollar,
+            math.inf if ttft is None else ttft,
+            math.inf if tbt is None else tbt,
+        )
+
+    def _prune(
+        self, job_configs: List[JobConfig], results: List[dict]
+    ) -> List[JobConfig]:
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, job_config in enumerate(job_configs):
+            key = (job_config.model_config.name, job_config.trace_config.name)
+            groups.setdefault(key, []).append(i)
+
+        kept_indices = []
+        for indices in groups.values():
+            num_kept = math.ceil(len(indices) / self.args.reduction_factor)
+            objectives = [
+                self._get_objectives(job_configs[i], results[i]) for i in indices
+            ]
+
+            group_kept_indices = []
+            for layer in get_pareto_layers(objectives):
+                if len(group_kept_indices) >= num_kept:
+                    break
+                group_kept_indices.extend(indices[i] for i in layer)
+            kept_indices.extend(group_kept_indices)
+
+        return [job_configs[i] for i in sorted(kept_indices)]
+
+    def run(self):
+        try:
+            if not self.args.skip_cache_warmup:
+                self._warmup_cache()
+
+            job_configs = JobConfig.generate_job_configs(self.config)
+
+            for rung in range(self.args.num_rungs):
+                rung_job_configs = [
+                    job_config.with_num_requests(
+                        self._get_rung_num_requests(
+                            job_config.trace_config.num_requests, rung
+                        )
+                    )
+                    for job_config in job_configs
+                ]
+                results = self._run_searches(rung_job_configs)
+
+                with open(f"{self.args.output_dir}/rung_{rung}_results.json", "w") as f:
+                    json.dump(results, f)
+
+                if rung == self.args.num_rungs - 1:
+                    return results
+
+                num_jobs = len(job_configs)
+                kept_job_configs = self._prune(rung_job_configs, results)
+                kept_keys = {job_config.get_key() for job_config in kept_job_configs}
+                job_configs = [
+                    job_config
+                    for job_config, rung_job_config in zip(
+                        job_configs, rung_job_configs
+                    )
+                    if rung_job_config.get_key() in kept_keys
+                ]
+                logger.info(
+                    f"Rung {rung}: kept {len(job_configs)} of {num_jobs} jobs for the next rung"
+                )
+        finally:
+            self._shutdown()
@@ -1,10 +1,22 @@
 class BaseEntity:
-    _id = -1
+    # empty slots so that slotted entities do not get an instance dict
+    __slots__ = ()
+
+    # per class id counter, kept apart from the instance level `_id`
+    _id_counter = -1
 
     @classmethod
     def generate_id(cls):
-        cls._id += 1
-        return cls._id
+        cls._id_counter += 1
+        return cls._id_counter
+
+    @classmethod
+    def reset_id_counters(cls) -> None:
+        # restart the ids of every entity class, for back to back simulations
+        # in one process
+        for subclass in cls.__subclasses__():
+            subclass._id_counter = -1
+            subclass.reset_id_counters()
 
     @property
     def id(self) -> int:
@@ -1,5 +1,7 @@
 from typing import List
 
+import numpy as np
+
 from vidur.entities.base_entity import BaseEntity
 from vidur.entities.request import Request
 from vidur.logger import init_logger
@@ -27,6 +29,25 @@ def check_completed(func):
 
 
 class Batch(BaseEntity):
+    __slots__ = (
+        "_id",
+        "_replica_id",
+        "_requests",
+        "_num_tokens",
+        "_num_tokens_array",
+        "_num_processed_tokens_array",
+        "_is_prefill_complete_array",
+        "_total_num_tokens",
+        "_num_prefill_tokens",
+        "_total_num_tokens_rounded",
+        "_decode_params",
+        "_prefill_params",
+        "_scheduled_at",
+        "_completed_at",
+        "_scheduled",
+        "_completed",
+    )
+
     def __init__(
         self,
         replica_id: int,
@@ -38,16 +59,33 @@ class Batch(BaseEntity):
 
         self._requests = requests
         self._num_tokens = num_tokens
-        self._total_num_tokens = sum(num_tokens)
-        self._num_prefill_tokens = sum(
-            [
-                (t if not r.is_prefill_complete else 0)
-                for r, t in zip(self.requests, self._num_tokens)
-            ]
+
+        # per request state snapshot at batch creation, requests are not
+        # updated until the batch ends so this holds for all the stages
+        num_requests = len(requests)
+        self._num_tokens_array = np.array(num_tokens, dtype=np.int64)
+        self._num_processed_tokens_array = np.fromiter(
+            (request._num_processed_tokens for request in requests),
+            dtype=np.int64,
+            count=num_requests,
+        )
+        self._is_prefill_complete_array = np.fromiter(
+            (request._is_prefill_complete for request in requests),
+            dtype=bool,
+            count=num_requests,
+        )
+
+        self._total_num_tokens = int(self._num_tokens_array.sum())
+        self._num_prefill_tokens = int(
+            self._num_tokens_array[~self._is_prefill_complete_array].sum()
         )
 
         self._total_num_tokens_rounded = (self._total_num_tokens + 7) // 8 * 8
 
+        # attention params memoized by the execution time predictor
+        self._decode_params = None
+        self._prefill_params = None
+
         self._scheduled_at = None
         self._completed_at = None
         self._scheduled = False
@@ -65,6 +103,18 @@ class Batch(BaseEntity):
     def num_tokens(self) -> List[int]:
         return self._num_tokens
 
+    @property
+    def num_tokens_array(self) -> np.ndarray:
+        return self._num_tokens_array
+
+    @property
+    def num_processed_tokens_array(self) -> np.ndarray:
+        return self._num_processed_tokens_array
+
+    @property
+    def is_prefill_complete_array(self) -> np.ndarray:
+        return self._is_prefill_complete_array
+
     @property
     def total_num_tokens(self) -> int:
         return self._total_num_tokens
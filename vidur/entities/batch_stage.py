@@ -1,5 +1,7 @@
 from typing import List
 
+import numpy as np
+
 from vidur.entities.base_entity import BaseEntity
 from vidur.entities.request import Request
 from vidur.logger import init_logger
@@ -18,6 +20,22 @@ def check_scheduled(func):
 
 
 class BatchStage(BaseEntity):
+    __slots__ = (
+        "_id",
+        "_requests",
+        "_num_tokens",
+        "_num_tokens_array",
+        "_num_processed_tokens_array",
+        "_batch_id",
+        "_replica_id",
+        "_pipeline_stage",
+        "_execution_time",
+        "_model_execution_time",
+        "_scheduled_at",
+        "_completed_at",
+        "_scheduled",
+    )
+
     def __init__(
         self,
         batch_id: int,
@@ -27,11 +45,22 @@ class BatchStage(BaseEntity):
         model_execution_time: float,
         requests: List[Request],
         num_tokens: List[Request],
+        num_tokens_array: np.ndarray = None,
+        num_processed_tokens_array: np.ndarray = None,
     ) -> None:
         self._id = BatchStage.generate_id()
 
         self._requests = requests
         self._num_tokens = num_tokens
+        if num_tokens_array is None:
+            num_tokens_array = np.array(num_tokens, dtype=np.int64)
+        if num_processed_tokens_array is None:
+            num_processed_tokens_array = np.array(
+                [request.num_processed_tokens for request in requests],
+                dtype=np.int64,
+            )
+        self._num_tokens_array = num_tokens_array
+        self._num_processed_tokens_array = num_processed_tokens_array
         self._batch_id = batch_id
         self._replica_id = replica_id
         self._pipeline_stage = pipeline_stage
@@ -46,6 +75,14 @@ class BatchStage(BaseEntity):
     def num_tokens(self) -> List[int]:
         return self._num_tokens
 
+    @property
+    def num_tokens_array(self) -> np.ndarray:
+        return self._num_tokens_array
+
+    @property
+    def num_processed_tokens_array(self) -> np.ndarray:
+        return self._num_processed_tokens_array
+
     @property
     @check_scheduled
     def scheduled_at(self) -> float:
@@ -26,6 +26,31 @@ def check_completed(func):
 
 
 class Request(BaseEntity):
+    __slots__ = (
+        "_id",
+        "_arrived_at",
+        "_num_prefill_tokens",
+        "_num_decode_tokens",
+        "_num_processed_tokens",
+        "_scheduled_at",
+        "_execution_time",
+        "_model_execution_time",
+        "_scheduling_delay",
+        "_preempted_time",
+        "_completed_at",
+        "_prefill_completed_at",
+        "_latest_stage_scheduled_at",
+        "_latest_stage_completed_at",
+        "_latest_iteration_scheduled_at",
+        "_latest_iteration_completed_at",
+        "_latest_iteration_scheduling_delay",
+        "_scheduled",
+        "_preempted",
+        "_completed",
+        "_is_prefill_complete",
+        "_num_restarts",
+    )
+
     def __init__(
         self,
         arrived_at: float,
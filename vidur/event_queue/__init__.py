@@ -0,0 +1,9 @@
+from vidur.event_queue.base_event_queue import BaseEventQueue
+from vidur.event_queue.event_queue_registry import EventQueueRegistry
+from vidur.event_queue.heap_event_queue import HeapEventQueue
+
+__all__ = [
+    BaseEventQueue,
+    EventQueueRegistry,
+    HeapEventQueue,
+]
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+
+from vidur.events import BaseEvent
+
+
+class BaseEventQueue(ABC):
+    @abstractmethod
+    def push(self, event: BaseEvent) -> None:
+        pass
+
+    @abstractmethod
+    def pop(self) -> BaseEvent:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
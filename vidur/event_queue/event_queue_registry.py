@@ -0,0 +1,12 @@
+from vidur.event_queue.heap_event_queue import HeapEventQueue
+from vidur.types import EventQueueType
+from vidur.utils.base_registry import BaseRegistry
+
+
+class EventQueueRegistry(BaseRegistry):
+    @classmethod
+    def get_key_from_str(cls, key_str: str) -> EventQueueType:
+        return EventQueueType.from_str(key_str)
+
+
+EventQueueRegistry.register(EventQueueType.HEAP, HeapEventQueue)
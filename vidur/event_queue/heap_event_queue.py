@@ -0,0 +1,19 @@
+import heapq
+
+from vidur.event_queue.base_event_queue import BaseEventQueue
+from vidur.events import BaseEvent
+
+
+class HeapEventQueue(BaseEventQueue):
+    def __init__(self) -> None:
+        self._heap = []
+
+    def push(self, event: BaseEvent) -> None:
+        heapq.heappush(self._heap, (event._priority_number, event))
+
+    def pop(self) -> BaseEvent:
+        _, event = heapq.heappop(self._heap)
+        return event
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -20,6 +20,10 @@ class BaseEvent(ABC):
         cls._id += 1
         return cls._id
 
+    @classmethod
+    def reset_id_counter(cls) -> None:
+        BaseEvent._id = 0
+
     @property
     def id(self) -> int:
         return self._id
@@ -1,8 +1,15 @@
 from vidur.execution_time_predictor.base_execution_time_predictor import (
     BaseExecutionTimePredictor,
 )
+from vidur.execution_time_predictor.execution_time_predictor_pool import (
+    ExecutionTimePredictorPool,
+)
 from vidur.execution_time_predictor.execution_time_predictor_registry import (
     ExecutionTimePredictorRegistry,
 )
 
-__all__ = [ExecutionTimePredictorRegistry, BaseExecutionTimePredictor]
+__all__ = [
+    ExecutionTimePredictorRegistry,
+    ExecutionTimePredictorPool,
+    BaseExecutionTimePredictor,
+]
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 import logging
-from typing import Tuple
+from typing import Hashable, Optional, Tuple
 import copy
 
 from vidur.config import (
@@ -52,6 +52,13 @@ class BaseExecutionTimePredictor(ABC):
         )
         
 
+    def get_batch_signature(
+        self, batch: Batch, pipeline_stage: int
+    ) -> Optional[Hashable]:
+        # key which fully determines the execution time of a batch stage,
+        # None disables memoization of the execution time
+        return None
+
     def get_execution_time(self, batch: Batch, pipeline_stage: int) -> ExecutionTime:
         if pipeline_stage == self._replica_config.num_pipeline_stages - 1:
             pipeline_parallel_communication_time = 0
@@ -0,0 +1,109 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from vidur.config import (
+    BaseExecutionTimePredictorConfig,
+    BaseReplicaSchedulerConfig,
+    MetricsConfig,
+    ReplicaConfig,
+)
+from vidur.config.utils import dataclass_to_dict
+from vidur.execution_time_predictor.base_execution_time_predictor import (
+    BaseExecutionTimePredictor,
+)
+from vidur.execution_time_predictor.execution_time_predictor_registry import (
+    ExecutionTimePredictorRegistry,
+)
+from vidur.logger import init_logger
+
+logger = init_logger(__name__)
+
+
+class ExecutionTimePredictorPool:
+    """
+    Process wide pool of execution time predictors. Replicas with the same
+    hardware and model fingerprint share a single predictor instance, which
+    must therefore be treated as read-only once constructed.
+
+    Predictors are kept for the later simulations of the process, e.g. the
+    in process probes of a capacity search worker. At most `max_size` of them
+    are kept, the least recently used ones are dropped first, so a worker that
+    goes through many job families does not hold on to all of their tables.
+    """
+
+    max_size: int = 8
+
+    _predictors: "OrderedDict[str, BaseExecutionTimePredictor]" = OrderedDict()
+
+    @classmethod
+    def get_fingerprint(
+        cls,
+        predictor_config: BaseExecutionTimePredictorConfig,
+        replica_config: ReplicaConfig,
+        replica_scheduler_config: BaseReplicaSchedulerConfig,
+        metrics_config: MetricsConfig,
+    ) -> str:
+        fingerprint = {
+            "predictor_type": str(predictor_config.get_type()),
+            "predictor_config": dataclass_to_dict(predictor_config),
+            "model_name": replica_config.model_name,
+            "device": replica_config.device,
+            "network_device": replica_config.network_device,
+            "tensor_parallel_size": replica_config.tensor_parallel_size,
+            "num_pipeline_stages": replica_config.num_pipeline_stages,
+            "replica_scheduler_type": str(replica_scheduler_config.get_type()),
+            "block_size": replica_scheduler_config.block_size,
+            "cache_dir": metrics_config.cache_dir,
+        }
+        fingerprint_str = json.dumps(fingerprint, sort_keys=True, default=str)
+        return hashlib.sha256(fingerprint_str.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(
+        cls,
+        predictor_config: BaseExecutionTimePredictorConfig,
+        replica_config: ReplicaConfig,
+        replica_scheduler_config: BaseReplicaSchedulerConfig,
+        metrics_config: MetricsConfig,
+    ) -> BaseExecutionTimePredictor:
+        fingerprint = cls.get_fingerprint(
+            predictor_config,
+            replica_config,
+            replica_scheduler_config,
+            metrics_config,
+        )
+
+        if fingerprint in cls._predictors:
+            cls._predictors.move_to_end(fingerprint)
+        else:
+            logger.info(
+                f"Creating execution time predictor for {replica_config.device} "
+                f"(tp={replica_config.tensor_parallel_size}, "
+                f"pp={replica_config.num_pipeline_stages})"
+            )
+            cls._predictors[fingerprint] = ExecutionTimePredictorRegistry.get(
+                predictor_config.get_type(),
+                predictor_config=predictor_config,
+                replica_config=replica_config,
+                replica_scheduler_config=replica_scheduler_config,
+                metrics_config=metrics_config,
+            )
+            cls._evict()
+
+        return cls._predictors[fingerprint]
+
+    @classmethod
+    def _evict(cls) -> None:
+        # replicas of a running simulation keep their own references, so an
+        # evicted predictor is only freed once no simulation uses it
+        while len(cls._predictors) > cls.max_size:
+            cls._predictors.popitem(last=False)
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._predictors)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._predictors.clear()
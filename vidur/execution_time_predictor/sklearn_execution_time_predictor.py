@@ -1,17 +1,15 @@
-import hashlib
-import os
-import pickle
 from abc import abstractmethod
-from itertools import product
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Hashable, List, Tuple
 
 import numpy as np
 import pandas as pd
-from fasteners import InterProcessReaderWriterLock
+import sklearn
+from joblib import Parallel, cpu_count, delayed
 from sklearn.base import BaseEstimator
 from sklearn.metrics import make_scorer
 from sklearn.model_selection import GridSearchCV
 
+from vidur.cache import ArtifactCache, get_dataframe_digest
 from vidur.config import (
     BaseExecutionTimePredictorConfig,
     BaseReplicaSchedulerConfig,
@@ -27,6 +25,29 @@ from vidur.logger import init_logger
 logger = init_logger(__name__)
 
 
+def _fit_grid_search(
+    estimator: BaseEstimator,
+    param_grid: Dict[str, Any],
+    scorer: Any,
+    cv: int,
+    n_jobs: int,
+    X: pd.DataFrame,
+    y: pd.Series,
+) -> Tuple[BaseEstimator, Dict[str, Any], float]:
+    # runs in a worker process, so it must not depend on the predictor instance
+    grid_search = GridSearchCV(
+        estimator=estimator,
+        param_grid=param_grid,
+        scoring=scorer,
+        cv=cv,
+        n_jobs=n_jobs,
+    )
+    grid_search.fit(X, y)
+    score = grid_search.score(X, y)
+
+    return grid_search.best_estimator_, grid_search.best_params_, score
+
+
 class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
     def __init__(
         self,
@@ -41,7 +62,10 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             replica_scheduler_config=replica_scheduler_config,
             metrics_config=metrics_config,
         )
-        os.makedirs(self._cache_dir, exist_ok=True)
+        self._artifact_cache = ArtifactCache(
+            self._cache_dir, int(metrics_config.cache_max_size_mb * 2**20)
+        )
+        self._model_keys = {}
 
         # 在访问 num_pipeline_stages 之前确保 replica_config 是正确的类型
         if isinstance(replica_config, list):
@@ -93,13 +117,13 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         # 添加调试信息
         print(f"replica_config type: {type(self._replica_config)}")
         print(f"replica_config content: {self._replica_config}")
-        
+
         # 假设 replica_config 是一个列表，我们需要获取第一个配置对象
         if isinstance(replica_config, list):
             self._replica_config = replica_config[0]  # 获取第一个配置对象
         else:
             self._replica_config = replica_config
-            
+
         self._replica_config.num_pipeline_stages  # 导致了错误
 
     def _get_input_files(self) -> Tuple[str, str, str, str, str]:
@@ -183,13 +207,13 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
 
     def _load_all_reduce_df(self, input_file):
         df = pd.read_csv(input_file)
-        
+
         # 检查必需的列是否存在
-        if 'collective' not in df.columns:
+        if "collective" not in df.columns:
             print(f"Warning: Required column 'collective' not found in {input_file}")
             # 可以返回空DataFrame或使用默认值
             return pd.DataFrame()
-        
+
         return df[
             (df["collective"] == "all_reduce")
             & (df["devices_per_node"] == self._replica_config.tensor_parallel_size)
@@ -245,13 +269,13 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         self, df: pd.DataFrame
     ) -> pd.DataFrame:
         # 首先检查列是否存在
-        if 'size' not in df.columns:
+        if "size" not in df.columns:
             # 根据实际情况选择正确的列名
             # 例如: 如果列名是 'message_size'
-            df = df.rename(columns={'message_size': 'size'})
+            df = df.rename(columns={"message_size": "size"})
             # 或者如果需要计算得出size列
             # df['size'] = ... # 计算size的逻辑
-        
+
         df_with_derived_features = df.copy()
         # convert bytes to num tokens
         # each token is of size 2 * h bytes
@@ -310,50 +334,42 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
     def _get_estimator(self) -> BaseEstimator:
         pass
 
-    def _get_model_hash(self, model_name: str, df: pd.DataFrame = None) -> str:
-        config_str = str(self.to_dict())
+    def _get_model_key(self, model_name: str, training_job: Dict[str, Any]) -> str:
+        # the rows are filtered by replica and model settings that are not all
+        # part of `to_dict`, so the key covers the training data itself
+        return ArtifactCache.get_key(
+            self.to_dict(),
+            model_name,
+            get_dataframe_digest(training_job["df"]),
+            training_job["feature_cols"],
+            training_job["target_col"],
+            self._get_estimator().get_params(),
+            self._get_grid_search_params(),
+            {
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "sklearn": sklearn.__version__,
+            },
+        )
 
-        if df is None:
-            combined_str = f"{config_str}_{model_name}"
-        else:
-            df_hash_str = hashlib.md5(df.to_json().encode("utf-8")).hexdigest()
-            combined_str = f"{config_str}_{model_name}_{df_hash_str}"
-
-        return hashlib.md5(combined_str.encode("utf-8")).hexdigest()[0:8]
-
-    def _load_model_from_cache(self, model_name: str, model_hash: str) -> BaseEstimator:
-        with InterProcessReaderWriterLock(
-            f"{self._cache_dir}/{model_hash}_model_lock.file"
-        ).read_lock():
-            if self._config.no_cache:
-                return
-            # check if model is in cache
-            cache_file = f"{self._cache_dir}/{model_name}_{model_hash}.pkl"
-            if not os.path.exists(cache_file):
-                return
+    def _load_model_from_cache(self, model_name: str, model_key: str) -> BaseEstimator:
+        if self._config.no_cache:
+            return
 
+        model = self._artifact_cache.load_pickle(model_key)
+        if model is not None:
             logger.debug(f"Found model {model_name} in cache")
-            try:
-                model = pickle.load(open(cache_file, "rb"))
-                return model
-            except (ModuleNotFoundError, ImportError):
-                # 如果加载失败，返回 None 以触发重新训练
-                return None
+        return model
 
     def _store_model_in_cache(
-        self, model_name: str, model_hash: str, model: BaseEstimator
+        self, model_name: str, model_key: str, model: BaseEstimator
     ) -> None:
-        with InterProcessReaderWriterLock(
-            f"{self._cache_dir}/{model_hash}_model_lock.file"
-        ).write_lock():
-            # store model in cache
-            cache_file = f"{self._cache_dir}/{model_name}_{model_hash}.pkl"
-            pickle.dump(model, open(cache_file, "wb"), protocol=pickle.HIGHEST_PROTOCOL)
+        self._artifact_cache.store_pickle(model_key, f"{model_name}_model", model)
 
     def _store_training_prediction_data(
         self,
         model_name: str,
-        model_hash: str,
+        model_key: str,
         df: pd.DataFrame,
         feature_cols: List[str],
         target_col: str,
@@ -365,130 +381,167 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         df["prediction"] = model.predict(df[feature_cols])
 
         # store the prediction data
-        df[feature_cols + [target_col, "prediction"]].to_csv(
-            f"{self._cache_dir}/{model_name}_{model_hash}_training_predictions.csv",
-            index=False,
+        self._artifact_cache.store(
+            ArtifactCache.get_key(model_key, "training_predictions"),
+            f"{model_name}_training_predictions",
+            ".csv",
+            lambda path: df[feature_cols + [target_col, "prediction"]].to_csv(
+                path, index=False
+            ),
         )
 
-    def _train_model(
-        self,
-        model_name: str,
-        df: pd.DataFrame,
-        feature_cols: List[str],
-        target_col: str,
-    ) -> BaseEstimator:
-        if len(df) == 0:
-            raise Exception(f"Training data for model {model_name} is empty")
+    def _get_num_training_processes(self, num_models: int) -> int:
+        num_processes = self._config.num_training_processes
+        if num_processes < 0:
+            num_processes = max(cpu_count() + 1 + num_processes, 1)
 
-        model_hash = self._get_model_hash(model_name, df)
+        return max(min(num_processes, num_models), 1)
 
-        cached_model = self._load_model_from_cache(model_name, model_hash)
-        if cached_model:
-            return cached_model
+    def _train_models_in_parallel(
+        self, training_jobs: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, BaseEstimator]:
+        models = {}
+        pending_jobs = {}
 
-        model = self._get_estimator()
-        grid_search_params = self._get_grid_search_params()
+        for model_name, training_job in training_jobs.items():
+            df = training_job["df"]
+            if len(df) == 0:
+                raise Exception(f"Training data for model {model_name} is empty")
 
-        if len(df) < self._config.k_fold_cv_splits:
-            cv = 2
-        else:
-            cv = self._config.k_fold_cv_splits
+            model_key = self._get_model_key(model_name, training_job)
+            self._model_keys[model_name] = model_key
 
-        grid_search = GridSearchCV(
-            estimator=model,
-            param_grid=grid_search_params,
-            scoring=self._get_scorer(),
-            cv=cv,
-            n_jobs=self._config.num_training_job_threads,
-        )
+            cached_model = self._load_model_from_cache(model_name, model_key)
+            if cached_model:
+                models[model_name] = cached_model
+            else:
+                pending_jobs[model_name] = (model_key, training_job)
 
-        # we don't create a train/test split, because we want to use all data for training
-        # and we don't care about overfitting, because we only want to predict execution time within the same domain
-        X, y = df[feature_cols], df[target_col]
+        if not pending_jobs:
+            return models
 
-        grid_search.fit(X, y)
-        score = grid_search.score(X, y)
+        num_processes = self._get_num_training_processes(len(pending_jobs))
+        # with several models in flight the process pool already occupies the
+        # cores, so the cross validation folds of each model run sequentially
+        num_cv_jobs = self._config.num_training_job_threads if num_processes == 1 else 1
 
         logger.info(
-            f"Trained model {model_name} and found best parameters: {grid_search.best_params_} "
-            f"with mean absolute percentage error (MEAP) {-score}%"
+            f"Training {len(pending_jobs)} models with {num_processes} processes"
         )
 
-        self._store_model_in_cache(model_name, model_hash, grid_search.best_estimator_)
+        def get_cv(df: pd.DataFrame) -> int:
+            if len(df) < self._config.k_fold_cv_splits:
+                return 2
+            return self._config.k_fold_cv_splits
 
-        self._store_training_prediction_data(
-            model_name=model_name,
-            model_hash=model_hash,
-            df=df,
-            feature_cols=feature_cols,
-            target_col=target_col,
-            model=grid_search.best_estimator_,
+        # we don't create a train/test split, because we want to use all data for training
+        # and we don't care about overfitting, because we only want to predict execution time within the same domain
+        results = Parallel(n_jobs=num_processes)(
+            delayed(_fit_grid_search)(
+                estimator=self._get_estimator(),
+                param_grid=self._get_grid_search_params(),
+                scorer=self._get_scorer(),
+                cv=get_cv(training_job["df"]),
+                n_jobs=num_cv_jobs,
+                X=training_job["df"][training_job["feature_cols"]],
+                y=training_job["df"][training_job["target_col"]],
+            )
+            for _, training_job in pending_jobs.values()
         )
-        return grid_search.best_estimator_
 
-    def _store_model_predication_cache(
-        self, model_name: str, model_hash: str, predictions: Dict[Tuple, float]
-    ) -> None:
-        with InterProcessReaderWriterLock(
-            f"{self._cache_dir}/{model_hash}_prediction_lock.file"
-        ).write_lock():
-            cache_file = f"{self._cache_dir}/{model_name}_{model_hash}_predictions.pkl"
-            pickle.dump(
-                predictions, open(cache_file, "wb"), protocol=pickle.HIGHEST_PROTOCOL
+        for (model_name, (model_key, training_job)), (
+            model,
+            best_params,
+            score,
+        ) in zip(pending_jobs.items(), results):
+            logger.info(
+                f"Trained model {model_name} and found best parameters: {best_params} "
+                f"with mean absolute percentage error (MEAP) {-score}%"
             )
 
-    def _load_model_predication_cache(
-        self, model_name: str, model_hash: str
-    ) -> Dict[Tuple, float]:
-        with InterProcessReaderWriterLock(
-            f"{self._cache_dir}/{model_hash}_prediction_lock.file"
-        ).read_lock():
-            if self._config.no_cache:
-                return
-            cache_file = f"{self._cache_dir}/{model_name}_{model_hash}_predictions.pkl"
+            self._store_model_in_cache(model_name, model_key, model)
 
-            if not os.path.exists(cache_file):
-                return
+            self._store_training_prediction_data(
+                model_name=model_name,
+                model_key=model_key,
+                df=training_job["df"],
+                feature_cols=training_job["feature_cols"],
+                target_col=training_job["target_col"],
+                model=model,
+            )
+            models[model_name] = model
+
+        # keep the model order independent of which models were cached
+        return {model_name: models[model_name] for model_name in training_jobs}
 
-            logger.debug(f"Found model {model_name} predictions in cache")
+    def _load_model_predication_cache(
+        self, model_name: str, prediction_key: str, shape: Tuple[int, ...]
+    ) -> np.ndarray:
+        if self._config.no_cache:
+            return
 
-            predictions = pickle.load(open(cache_file, "rb"))
-            return predictions
+        predictions = self._artifact_cache.load_array(prediction_key)
+        if predictions is None or predictions.shape != shape:
+            return
+
+        logger.debug(f"Found model {model_name} predictions in cache")
+        return predictions
 
     def _get_model_prediction(
-        self, model_name: str, model: BaseEstimator, X: pd.DataFrame
-    ) -> Dict[Tuple, float]:
+        self,
+        model_name: str,
+        model: BaseEstimator,
+        X: pd.DataFrame,
+        shape: Tuple[int, ...],
+    ) -> np.ndarray:
+        # X enumerates the prediction grid in row-major order, so the predictions
+        # reshape into a dense table indexed by the (bucketed) feature values
         X = X.copy()
 
-        model_hash = self._get_model_hash(model, df=None)
+        prediction_key = ArtifactCache.get_key(
+            self._model_keys[model_name], "predictions", shape
+        )
 
-        cached_predictions = self._load_model_predication_cache(model_name, model_hash)
-        if cached_predictions:
+        cached_predictions = self._load_model_predication_cache(
+            model_name, prediction_key, shape
+        )
+        if cached_predictions is not None:
             return cached_predictions
 
         logger.info(f"Predicting execution time for model {model_name}")
 
-        predictions_array = model.predict(X)
-
-        # turn this into a dict, so we can store use it as a cache
-        # the key is tuple for each row of X
-        predictions = dict(zip([tuple(x) for x in X.values], predictions_array))
+        chunk_size = self._config.prediction_chunk_size
+        # the grid is predicted in row chunks on a thread pool, numpy releases
+        # the gil for the heavy lifting and the model is never copied
+        predictions_array = np.concatenate(
+            Parallel(n_jobs=self._config.num_training_job_threads, prefer="threads")(
+                delayed(model.predict)(X.iloc[start : start + chunk_size])
+                for start in range(0, len(X), chunk_size)
+            )
+        )
+        predictions = np.ascontiguousarray(predictions_array, dtype=np.float64).reshape(
+            shape
+        )
 
-        self._store_model_predication_cache(model_name, model_hash, predictions)
+        self._artifact_cache.store_array(
+            prediction_key, f"{model_name}_predictions", predictions
+        )
 
         X["prediction"] = predictions_array
-        X.to_csv(
-            f"{self._cache_dir}/{model_name}_{model_hash}_predictions.csv",
-            index=False,
+        self._artifact_cache.store(
+            ArtifactCache.get_key(prediction_key, "csv"),
+            f"{model_name}_predictions",
+            ".csv",
+            lambda path: X.to_csv(path, index=False),
         )
 
         return predictions
 
-    def _train_compute_models(self) -> Dict[str, BaseEstimator]:
+    def _get_compute_training_jobs(self) -> Dict[str, Dict[str, Any]]:
         compute_df = self._load_compute_df(self._compute_input_file)
         compute_df = self._get_compute_df_with_derived_features(compute_df)
 
-        models = {}
+        training_jobs = {}
         model_names = [
             "attn_pre_proj",
             "attn_post_proj",
@@ -505,8 +558,7 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             logger.debug(
                 f"Training model {model_name}, size of training data: {len(compute_df)}"
             )
-            models[model_name] = self._train_model(
-                model_name=model_name,
+            training_jobs[model_name] = dict(
                 df=compute_df,
                 feature_cols=["num_tokens"],
                 target_col=f"time_stats.{model_name}.median",
@@ -520,8 +572,7 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         ]
 
         for model_name in model_names:
-            models[model_name] = self._train_model(
-                model_name=model_name,
+            training_jobs[model_name] = dict(
                 df=attention_df,
                 feature_cols=["num_tokens"],
                 target_col=f"time_stats.{model_name}.median",
@@ -531,8 +582,7 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             send_recv_df = self._load_send_recv_df(self._send_recv_input_file)
             send_recv_df = self._get_send_recv_df_with_derived_features(send_recv_df)
 
-            models["send_recv"] = self._train_model(
-                model_name="send_recv",
+            training_jobs["send_recv"] = dict(
                 df=send_recv_df,
                 feature_cols=["num_tokens"],
                 target_col="time_stats.send_recv.median",
@@ -542,20 +592,19 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             all_reduce_df = self._load_all_reduce_df(self._all_reduce_input_file)
             all_reduce_df = self._get_all_reduce_df_with_derived_features(all_reduce_df)
 
-            models["all_reduce"] = self._train_model(
-                model_name="all_reduce",
+            training_jobs["all_reduce"] = dict(
                 df=all_reduce_df,
                 feature_cols=["num_tokens"],
                 target_col="time_stats.all_reduce.median",
             )
 
-        return models
+        return training_jobs
 
-    def _train_cpu_overhead_models(self) -> Dict[str, BaseEstimator]:
+    def _get_cpu_overhead_training_jobs(self) -> Dict[str, Dict[str, Any]]:
         if self._config.skip_cpu_overhead_modeling:
             return {}
 
-        models = {}
+        training_jobs = {}
         model_names = [
             "schedule",
             "sampler_e2e",
@@ -575,22 +624,21 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             else:
                 target_col = f"{model_name}_median"
 
-            models[model_name] = self._train_model(
-                model_name=model_name,
+            training_jobs[model_name] = dict(
                 df=cpu_overhead_df,
                 feature_cols=["batch_size"],
                 target_col=target_col,
             )
 
-        return models
+        return training_jobs
 
-    def _train_attention_layer_models(self) -> Dict[str, BaseEstimator]:
+    def _get_attention_layer_training_jobs(self) -> Dict[str, Dict[str, Any]]:
         attention_df = self._load_attention_df(self._attention_input_file)
         attention_df = self._get_attention_df_with_derived_features(attention_df)
         prefill_df = attention_df[~attention_df["is_decode"]]
         decode_df = attention_df[attention_df["is_decode"]]
 
-        models = {}
+        training_jobs = {}
 
         chunked_prefill_df = prefill_df[prefill_df["kv_cache_size"] > 0].copy()
         chunked_prefill_df["total_prefill_tokens"] = (
@@ -598,28 +646,26 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             + chunked_prefill_df["prefill_chunk_size"]
         )
 
-        models["attn_prefill"] = self._train_model(
-            model_name="attn_prefill",
+        training_jobs["attn_prefill"] = dict(
             df=prefill_df,
             feature_cols=["kv_cache_size", "prefill_chunk_size_squared"],
             target_col="time_stats.attn_prefill.median",
         )
 
-        models["attn_decode"] = self._train_model(
-            model_name="attn_decode",
+        training_jobs["attn_decode"] = dict(
             df=decode_df,
             feature_cols=["batch_size", "kv_cache_size"],
             target_col="time_stats.attn_decode.median",
         )
 
-        return models
+        return training_jobs
 
     def _train_models(self) -> Dict[str, BaseEstimator]:
-        models = self._train_compute_models()
-        models.update(self._train_cpu_overhead_models())
-        models.update(self._train_attention_layer_models())
+        training_jobs = self._get_compute_training_jobs()
+        training_jobs.update(self._get_cpu_overhead_training_jobs())
+        training_jobs.update(self._get_attention_layer_training_jobs())
 
-        return models
+        return self._train_models_in_parallel(training_jobs)
 
     def _predict_for_compute_models(self) -> Dict[str, Any]:
         predictions = {}
@@ -648,7 +694,9 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
 
         for model_name in model_names:
             model = self._models[model_name]
-            predictions[model_name] = self._get_model_prediction(model_name, model, X)
+            predictions[model_name] = self._get_model_prediction(
+                model_name, model, X, (len(num_token_range),)
+            )
 
         return predictions
 
@@ -671,7 +719,9 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
 
         for model_name in model_names:
             model = self._models[model_name]
-            predictions[model_name] = self._get_model_prediction(model_name, model, X)
+            predictions[model_name] = self._get_model_prediction(
+                model_name, model, X, (len(batch_size_range),)
+            )
 
         return predictions
 
@@ -686,16 +736,6 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             self._config.prediction_max_tokens_per_request + 1,
             self._config.kv_cache_prediction_granularity,
         )
-        decode_prefill_chunk_size_range = [0]
-        decode_batch_size, decode_kv_cache_size, decode_prefill_chunk_size = zip(
-            *product(
-                decode_batch_size_range,
-                decode_kv_cache_size_range,
-                decode_prefill_chunk_size_range,
-            )
-        )
-
-        prefill_batch_size_range = [1]
         prefill_kv_cache_size_range = np.arange(
             0,
             self._config.prediction_max_tokens_per_request + 1,
@@ -704,49 +744,48 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         prefill_prefill_chunk_size_range = np.arange(
             1, self._config.prediction_max_prefill_chunk_size + 1
         )
-        prefill_batch_size, prefill_kv_cache_size, prefill_prefill_chunk_size = zip(
-            *product(
-                prefill_batch_size_range,
+
+        # meshgrids in "ij" order flatten to the same row-major order as the
+        # prediction tables below
+        decode_batch_size, decode_kv_cache_size = (
+            grid.ravel()
+            for grid in np.meshgrid(
+                decode_batch_size_range, decode_kv_cache_size_range, indexing="ij"
+            )
+        )
+        decode_df = pd.DataFrame(
+            {"batch_size": decode_batch_size, "kv_cache_size": decode_kv_cache_size}
+        )
+
+        prefill_kv_cache_size, prefill_prefill_chunk_size = (
+            grid.ravel()
+            for grid in np.meshgrid(
                 prefill_kv_cache_size_range,
                 prefill_prefill_chunk_size_range,
+                indexing="ij",
             )
         )
-
-        attention_df = pd.DataFrame(
+        prefill_df = pd.DataFrame(
             {
-                "batch_size": decode_batch_size + prefill_batch_size,
-                "kv_cache_size": decode_kv_cache_size + prefill_kv_cache_size,
-                "prefill_chunk_size": decode_prefill_chunk_size
-                + prefill_prefill_chunk_size,
+                "kv_cache_size": prefill_kv_cache_size,
+                "prefill_chunk_size_squared": prefill_prefill_chunk_size**2,
             }
         )
 
-        attention_df["is_decode"] = attention_df["prefill_chunk_size"] == 0
-        attention_df["num_tokens"] = attention_df[
-            ["prefill_chunk_size", "batch_size"]
-        ].max(axis=1)
-        attention_df["prefill_chunk_size_squared"] = (
-            attention_df["prefill_chunk_size"] ** 2
-        )
-
-        prefill_df = attention_df[~attention_df["is_decode"]]
-        decode_df = attention_df[attention_df["is_decode"]]
-        chunked_prefill_df = prefill_df[prefill_df["kv_cache_size"] > 0].copy()
-        chunked_prefill_df["total_prefill_tokens"] = (
-            chunked_prefill_df["kv_cache_size"]
-            + chunked_prefill_df["prefill_chunk_size"]
-        )
-
+        # indexed by (kv_cache_size // granularity, prefill_chunk_size - 1)
         predictions["attn_prefill"] = self._get_model_prediction(
             "attn_prefill",
             self._models["attn_prefill"],
             prefill_df[["kv_cache_size", "prefill_chunk_size_squared"]],
+            (len(prefill_kv_cache_size_range), len(prefill_prefill_chunk_size_range)),
         )
 
+        # indexed by (batch_size - 1, kv_cache_size // granularity)
         predictions["attn_decode"] = self._get_model_prediction(
             "attn_decode",
             self._models["attn_decode"],
             decode_df[["batch_size", "kv_cache_size"]],
+            (len(decode_batch_size_range), len(decode_kv_cache_size_range)),
         )
 
         return predictions
@@ -759,21 +798,19 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         return predictions
 
     def _get_batch_decode_attention_params(self, batch: Batch) -> Tuple[int, int]:
-        if hasattr(batch, "_decode_params"):
+        if batch._decode_params is not None:
             return batch._decode_params
 
-        decode_kv_cache_sizes = []
-
-        for request in batch.requests:
-            if request._is_prefill_complete:
-                decode_kv_cache_sizes.append(request.num_processed_tokens)
+        decode_kv_cache_sizes = batch.num_processed_tokens_array[
+            batch.is_prefill_complete_array
+        ]
 
-        if not decode_kv_cache_sizes:
+        if not len(decode_kv_cache_sizes):
             batch._decode_params = (0, 0)
             return batch._decode_params
 
         decode_batch_size = len(decode_kv_cache_sizes)
-        decode_avg_kv_cache_size = int(np.mean(decode_kv_cache_sizes))
+        decode_avg_kv_cache_size = int(decode_kv_cache_sizes.mean())
         decode_avg_kv_cache_size = (
             (
                 decode_avg_kv_cache_size
@@ -789,64 +826,69 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
 
     def _get_batch_prefill_attention_params(
         self, batch: Batch
-    ) -> List[Tuple[int, int]]:
-        if hasattr(batch, "_prefill_params"):
+    ) -> Tuple[Tuple[int, int], ...]:
+        if batch._prefill_params is not None:
             return batch._prefill_params
 
-        prefill_params = []
-
-        for request, num_tokens_to_process in zip(batch.requests, batch.num_tokens):
-            if request._is_prefill_complete:
-                continue
-
-            prefill_chunk_size = num_tokens_to_process
-            kv_cache_size = (
-                (
-                    request.num_processed_tokens
-                    + self._config.kv_cache_prediction_granularity
-                    - 1
-                )
-                // self._config.kv_cache_prediction_granularity
-            ) * self._config.kv_cache_prediction_granularity
+        is_prefill = ~batch.is_prefill_complete_array
+        prefill_chunk_sizes = batch.num_tokens_array[is_prefill]
+        kv_cache_sizes = (
+            (
+                batch.num_processed_tokens_array[is_prefill]
+                + self._config.kv_cache_prediction_granularity
+                - 1
+            )
+            // self._config.kv_cache_prediction_granularity
+        ) * self._config.kv_cache_prediction_granularity
 
-            prefill_params.append((kv_cache_size, prefill_chunk_size))
+        batch._prefill_params = tuple(
+            zip(kv_cache_sizes.tolist(), prefill_chunk_sizes.tolist())
+        )
 
-        batch._prefill_params = prefill_params
+        return batch._prefill_params
 
-        return prefill_params
+    def get_batch_signature(self, batch: Batch, pipeline_stage: int) -> Hashable:
+        return (
+            batch._total_num_tokens_rounded,
+            batch._total_num_tokens,
+            batch.size,
+            self._get_batch_decode_attention_params(batch),
+            self._get_batch_prefill_attention_params(batch),
+            pipeline_stage,
+        )
 
     def _get_attention_layer_pre_proj_execution_time(self, batch: Batch) -> float:
-        return self._predictions["attn_pre_proj"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["attn_pre_proj"][batch._total_num_tokens_rounded - 1]
 
     def _get_attention_layer_post_proj_execution_time(self, batch: Batch) -> float:
-        return self._predictions["attn_post_proj"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["attn_post_proj"][batch._total_num_tokens_rounded - 1]
 
     def _get_mlp_layer_up_proj_execution_time(self, batch: Batch) -> float:
-        return self._predictions["mlp_up_proj"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["mlp_up_proj"][batch._total_num_tokens_rounded - 1]
 
     def _get_mlp_layer_down_proj_execution_time(self, batch: Batch) -> float:
-        return self._predictions["mlp_down_proj"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["mlp_down_proj"][batch._total_num_tokens_rounded - 1]
 
     def _get_mlp_layer_act_execution_time(self, batch: Batch) -> float:
-        return self._predictions["mlp_act"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["mlp_act"][batch._total_num_tokens_rounded - 1]
 
     def _get_attn_norm_layer_act_execution_time(self, batch: Batch) -> float:
-        return self._predictions["input_layernorm"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["input_layernorm"][batch._total_num_tokens_rounded - 1]
 
     def _get_mlp_norm_layer_act_execution_time(self, batch: Batch) -> float:
         if not self._model_config.post_attn_norm:
             return 0
 
         return self._predictions["post_attention_layernorm"][
-            (batch._total_num_tokens_rounded,)
+            batch._total_num_tokens_rounded - 1
         ]
 
     def _get_add_layer_act_execution_time(self, batch: Batch) -> float:
-        return self._predictions["add"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["add"][batch._total_num_tokens_rounded - 1]
 
     def _get_tensor_parallel_communication_time(self, batch: Batch) -> float:
         return (
-            self._predictions["all_reduce"][(batch._total_num_tokens_rounded,)]
+            self._predictions["all_reduce"][batch._total_num_tokens_rounded - 1]
             + self._config.nccl_cpu_launch_overhead_ms
             + self._config.nccl_cpu_skew_overhead_per_device_ms
             * self._replica_config.tensor_parallel_size**1.25
@@ -854,20 +896,20 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
 
     def _get_pipeline_parallel_communication_time(self, batch: Batch) -> float:
         try:
-            return self._predictions["send_recv"][(batch._total_num_tokens_rounded,)]
-        except KeyError as e:
+            return self._predictions["send_recv"][batch._total_num_tokens_rounded - 1]
+        except IndexError as e:
             logger.error(f"Failed to get send_recv prediction for batch {batch}")
             raise e
 
     def _get_attention_rope_execution_time(self, batch: Batch) -> float:
-        return self._predictions["attn_rope"][(batch._total_num_tokens_rounded,)]
+        return self._predictions["attn_rope"][batch._total_num_tokens_rounded - 1]
 
     def _get_attention_kv_cache_save_execution_time(self, batch: Batch) -> float:
         # don't use round up to the nearest multiple of 8 here, because we want to
         # predict the execution time for the exact number of tokens
-        num_tokens = sum(batch.num_tokens)
+        num_tokens = batch.total_num_tokens
 
-        return self._predictions["attn_kv_cache_save"][(num_tokens,)]
+        return self._predictions["attn_kv_cache_save"][num_tokens - 1]
 
     def _get_attention_decode_execution_time(self, batch: Batch) -> float:
         (
@@ -878,7 +920,8 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             return 0
 
         return self._predictions["attn_decode"][
-            (decode_batch_size, decode_avg_kv_cache_size)
+            decode_batch_size - 1,
+            decode_avg_kv_cache_size // self._config.kv_cache_prediction_granularity,
         ] * (
             1
             + self._attention_decode_batching_overhead_fraction
@@ -897,7 +940,8 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         agg_prefill_chunk_size = sum([x**2 for x in prefill_chunk_sizes]) ** 0.5
 
         return self._predictions["attn_prefill"][
-            (agg_kv_cache_size, round(agg_prefill_chunk_size) ** 2)
+            agg_kv_cache_size // self._config.kv_cache_prediction_granularity,
+            round(agg_prefill_chunk_size) - 1,
         ] * (
             1
             + self._attention_prefill_batching_overhead_fraction
@@ -908,31 +952,31 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
         if self._config.skip_cpu_overhead_modeling:
             return 0
 
-        return self._predictions["schedule"][(batch.size,)]
+        return self._predictions["schedule"][batch.size - 1]
 
     def _get_sampler_e2e_time(self, batch: Batch) -> float:
         if self._config.skip_cpu_overhead_modeling:
             return 0
 
-        return self._predictions["sampler_e2e"][(batch.size,)]
+        return self._predictions["sampler_e2e"][batch.size - 1]
 
     def _get_prepare_inputs_e2e_time(self, batch: Batch) -> float:
         if self._config.skip_cpu_overhead_modeling:
             return 0
 
-        return self._predictions["prepare_inputs_e2e"][(batch.size,)]
+        return self._predictions["prepare_inputs_e2e"][batch.size - 1]
 
     def _get_process_model_outputs_time(self, batch: Batch) -> float:
         if self._config.skip_cpu_overhead_modeling:
             return 0
 
-        return self._predictions["process_model_outputs"][(batch.size,)]
+        return self._predictions["process_model_outputs"][batch.size - 1]
 
     def _get_ray_comm_time(self, batch: Batch) -> float:
         if self._config.skip_cpu_overhead_modeling:
             return 0
 
-        return self._predictions["ray_comm_time"][(batch.size,)]
+        return self._predictions["ray_comm_time"][batch.size - 1]
 
     def to_dict(self) -> dict:
         return {
@@ -947,6 +991,7 @@ class SklearnExecutionTimePredictor(BaseExecutionTimePredictor):
             "vocab_size": self._model_config.vocab_size,
             "block_size": self._block_size,
             "max_tokens": self._max_tokens,
+            "kv_cache_prediction_granularity": self._config.kv_cache_prediction_granularity,
             "compute_input_file": self._compute_input_file,
             "all_reduce_input_file": self._all_reduce_input_file,
             "send_recv_input_file": self._send_recv_input_file,
@@ -1,3 +1,5 @@
+import atexit
+
 from vidur.config import SimulationConfig
 from vidur.simulator import Simulator
 from vidur.utils.random import set_seeds
@@ -9,6 +11,8 @@ def main() -> None:
     set_seeds(config.seed)
 
     simulator = Simulator(config)
+    # the output is also written when the run is interrupted
+    atexit.register(simulator.write_output)
     simulator.run()
 
 
@@ -0,0 +1,74 @@
+import random
+from typing import Dict, List
+
+import numpy as np
+
+
+class BatchMetricsSampler:
+    """
+    Ingestion time sample of the batches whose per batch metrics are kept. The
+    decision is made once per batch id and shared by all the per batch series
+    so that their rows still join on the batch id.
+
+    Every stratum keeps a reservoir (Algorithm R) of at most
+    `max_samples // num_strata` batches, i.e. a uniform sample of the batches
+    seen in it. With more than one stratum a kept batch stands for
+    `num_seen / num_kept` batches of its stratum, see `get_weights`.
+    """
+
+    def __init__(self, max_samples: int, num_strata: int = 1, seed: int = 0) -> None:
+        self._stratum_size = max(max_samples // num_strata, 1)
+        self._reservoirs: List[List[int]] = [[] for _ in range(num_strata)]
+        self._num_seen = [0] * num_strata
+        self._rng = random.Random(seed)
+
+        # decisions for batches that can still push metrics
+        self._decisions: Dict[int, bool] = {}
+        # batches dropped from a reservoir after some of their metrics were kept
+        self._num_evicted = 0
+
+    @property
+    def num_evicted(self) -> int:
+        return self._num_evicted
+
+    def sample(self, batch_id: int, stratum: int = 0) -> bool:
+        if batch_id in self._decisions:
+            return self._decisions[batch_id]
+
+        reservoir = self._reservoirs[stratum]
+        self._num_seen[stratum] += 1
+
+        if len(reservoir) < self._stratum_size:
+            reservoir.append(batch_id)
+            is_sampled = True
+        else:
+            slot = self._rng.randrange(self._num_seen[stratum])
+            is_sampled = slot < self._stratum_size
+            if is_sampled:
+                reservoir[slot] = batch_id
+                self._num_evicted += 1
+
+        self._decisions[batch_id] = is_sampled
+        return is_sampled
+
+    def is_sampled(self, batch_id: int) -> bool:
+        return self._decisions[batch_id]
+
+    def release(self, batch_id: int) -> None:
+        # the batch has ended, none of its metrics are pushed after this
+        self._decisions.pop(batch_id, None)
+
+    def get_sampled_batch_ids(self) -> np.ndarray:
+        # called to compact the series, which drops all the evicted batches
+        self._num_evicted = 0
+        return np.array(
+            [batch_id for reservoir in self._reservoirs for batch_id in reservoir],
+            dtype=np.int64,
+        )
+
+    def get_weights(self) -> Dict[int, float]:
+        weights = {}
+        for reservoir, num_seen in zip(self._reservoirs, self._num_seen):
+            for batch_id in reservoir:
+                weights[batch_id] = num_seen / len(reservoir)
+        return weights
@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 import numpy as np
 import pandas as pd
 import plotly_express as px
@@ -9,6 +11,11 @@ from vidur.logger import init_logger
 logger = init_logger(__name__)
 
 
+def get_quantile_key(quantile: float) -> str:
+    # 0.5 -> p50, 0.999 -> p99.9
+    return f"p{quantile * 100:g}"
+
+
 class CDFSketch:
     def __init__(
         self,
@@ -31,10 +38,10 @@ class CDFSketch:
     def __len__(self):
         return int(self._sketch.count)
 
-    # add a new x, y datapoint
-    def put(self, data: float) -> None:
+    # add a new datapoint, count > 1 adds it as a single weighted insert
+    def put(self, data: float, count: int = 1) -> None:
         self._last_data = data
-        self._sketch.add(data)
+        self._sketch.add(data, count)
 
     # add a new datapoint as an incremental (delta) update to
     # recently collected datapoint
@@ -102,6 +109,19 @@ class CDFSketch:
     def sum(self) -> float:
         return self._sketch.sum
 
+    def get_summary(self, quantiles: List[float]) -> Dict[str, float]:
+        summary = {
+            "count": self._sketch.count,
+            "mean": self._sketch.avg,
+            "min": self._sketch._min,
+            "max": self._sketch._max,
+        }
+        for quantile in quantiles:
+            summary[get_quantile_key(quantile)] = self._sketch.get_quantile_value(
+                quantile
+            )
+        return summary
+
     def _save_df(self, df: pd.DataFrame, path: str, plot_name: str) -> None:
         df.to_csv(f"{path}/{plot_name}.csv")
 
@@ -1,5 +1,4 @@
-from collections import defaultdict
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -10,6 +9,12 @@ from vidur.logger import init_logger
 
 logger = init_logger(__name__)
 
+# number of datapoints staged in python lists before they are moved into a
+# numpy column chunk
+CHUNK_SIZE = 4096
+
+COUNT_COLUMN = "count"
+
 
 class DataSeries:
     def __init__(
@@ -19,9 +24,22 @@ class DataSeries:
         subsamples: Optional[int] = None,
         save_table_to_wandb: bool = True,
         save_plots: bool = True,
+        spill_file: Optional[str] = None,
     ) -> None:
-        # metrics are a data series of two-dimensional (x, y) datapoints
-        self._data_series = []
+        # metrics are a data series of two-dimensional (x, y) datapoints, kept
+        # as lists of numpy column chunks plus the datapoints not flushed yet
+        self._x_chunks: List[np.ndarray] = []
+        self._y_chunks: List[np.ndarray] = []
+        self._pending_x = []
+        self._pending_y = []
+        self._num_datapoints = 0
+        # flushed chunks are appended to this csv instead of being kept in
+        # memory until the columns are read back for plotting
+        self._spill_file = spill_file
+        self._num_spilled = 0
+        # index -> count of datapoints that stand for a run of repeated values
+        self._run_lengths: Dict[int, int] = {}
+        self._num_repeats = 0
         # column names of x, y datatpoints for data collection
         self._x_name = x_name
         self._y_name = y_name
@@ -34,37 +52,169 @@ class DataSeries:
         self._save_table_to_wandb = save_table_to_wandb
         self._save_plots = save_plots
 
+    def _flush_pending(self) -> None:
+        if not self._pending_x:
+            return
+
+        # numpy infers int64 or float64 per column the same way pandas does
+        x = np.array(self._pending_x)
+        y = np.array(self._pending_y)
+        self._pending_x = []
+        self._pending_y = []
+
+        if self._spill_file is None:
+            self._x_chunks.append(x)
+            self._y_chunks.append(y)
+            return
+
+        self._spill(x, y)
+
+    def _spill(self, x: np.ndarray, y: np.ndarray) -> None:
+        start = self._num_spilled
+        run_lengths = [
+            self._run_lengths.pop(i, 1) for i in range(start, start + len(x))
+        ]
+        pd.DataFrame(
+            {self._x_name: x, self._y_name: y, COUNT_COLUMN: run_lengths}, copy=False
+        ).to_csv(
+            self._spill_file,
+            mode="a" if start else "w",
+            header=start == 0,
+            index=False,
+        )
+        self._num_spilled += len(x)
+
+    def _load_spilled(self) -> None:
+        df = pd.read_csv(self._spill_file, float_precision="round_trip")
+        self._x_chunks.insert(0, df[self._x_name].to_numpy())
+        self._y_chunks.insert(0, df[self._y_name].to_numpy())
+        run_lengths = df[COUNT_COLUMN].to_numpy()
+        for i in np.flatnonzero(run_lengths > 1):
+            self._run_lengths[int(i)] = int(run_lengths[i])
+
+        # from here on the series lives in memory
+        self._spill_file = None
+        self._num_spilled = 0
+
+    def _get_columns(self) -> Tuple[np.ndarray, np.ndarray]:
+        self._flush_pending()
+        if self._num_spilled:
+            self._load_spilled()
+
+        if not self._x_chunks:
+            return np.empty(0), np.empty(0)
+
+        if len(self._x_chunks) > 1:
+            self._x_chunks = [np.concatenate(self._x_chunks)]
+            self._y_chunks = [np.concatenate(self._y_chunks)]
+
+        return self._x_chunks[0], self._y_chunks[0]
+
+    def _get_run_lengths(self) -> Optional[np.ndarray]:
+        if not self._run_lengths:
+            return None
+
+        run_lengths = np.ones(self._num_datapoints, dtype=np.int64)
+        run_lengths[np.fromiter(self._run_lengths.keys(), dtype=np.int64)] = list(
+            self._run_lengths.values()
+        )
+        return run_lengths
+
     def consolidate(
         self,
     ):
-        res = defaultdict(list)
-        for x, y in self._data_series:
-            res[x].append(y)
-        self._data_series = [(x, sum(y) / len(y)) for x, y in res.items()]
+        # replace the datapoints with the mean y for every x, sorted by x
+        x, y = self._get_columns()
+        run_lengths = self._get_run_lengths()
+
+        unique_x, first_indices, inverse, num_datapoints = np.unique(
+            x, return_index=True, return_inverse=True, return_counts=True
+        )
+        if run_lengths is None:
+            y_sums = np.bincount(inverse, weights=y, minlength=len(unique_x))
+            y_counts = num_datapoints
+        else:
+            y_sums = np.bincount(
+                inverse, weights=y * run_lengths, minlength=len(unique_x)
+            )
+            y_counts = np.bincount(
+                inverse, weights=run_lengths, minlength=len(unique_x)
+            )
+        mean_y = y_sums / y_counts
+        # a single (run of) datapoint(s) is its own mean
+        is_single = num_datapoints == 1
+        mean_y[is_single] = y[first_indices[is_single]]
+
+        self._x_chunks = [unique_x]
+        self._y_chunks = [mean_y]
+        self._num_datapoints = len(unique_x)
+        self._run_lengths = {}
+        self._num_repeats = 0
+
+        self._last_data_y = float(mean_y[-1]) if len(mean_y) else 0
+
+    def filter_x(self, keep_x: np.ndarray) -> None:
+        # drop the datapoints whose x is not in keep_x
+        spill_file = self._spill_file
+        x, y = self._get_columns()
+        run_lengths = self._get_run_lengths()
+
+        is_kept = np.isin(x, keep_x)
+        x = x[is_kept]
+        y = y[is_kept]
+        self._num_datapoints = len(x)
+        self._run_lengths = {}
+        self._num_repeats = 0
+        if run_lengths is not None:
+            run_lengths = run_lengths[is_kept]
+            for i in np.flatnonzero(run_lengths > 1):
+                self._run_lengths[int(i)] = int(run_lengths[i])
+            self._num_repeats = int(run_lengths.sum()) - self._num_datapoints
+
+        if spill_file is None or not len(x):
+            self._x_chunks = [x]
+            self._y_chunks = [y]
+            self._spill_file = spill_file
+            return
 
-        # sort by x
-        self._data_series = sorted(self._data_series, key=lambda x: x[0])
-        self._last_data_y = self._data_series[-1][1] if len(self._data_series) else 0
+        # keep spilling, the kept datapoints replace the spilled ones
+        self._x_chunks = []
+        self._y_chunks = []
+        self._spill_file = spill_file
+        self._spill(x, y)
 
     def __len__(self):
-        return len(self._data_series)
+        return self._num_datapoints + self._num_repeats
 
     @property
     def _metric_name(self) -> str:
         return self._y_name
 
-    # add a new x, y datapoint
-    def put(self, data_x: float, data_y: float) -> None:
+    # add a new x, y datapoint, count > 1 stores a run of repeated datapoints
+    def put(self, data_x: float, data_y: float, count: int = 1) -> None:
         self._last_data_y = data_y
-        self._data_series.append((data_x, data_y))
+        if count > 1:
+            self._run_lengths[self._num_datapoints] = count
+            self._num_repeats += count - 1
+        self._pending_x.append(data_x)
+        self._pending_y.append(data_y)
+        self._num_datapoints += 1
+        if len(self._pending_x) >= CHUNK_SIZE:
+            self._flush_pending()
 
     # get most recently collected y datapoint
     def _peek_y(self):
         return self._last_data_y
 
-    # convert list of x, y datapoints to a pandas dataframe
+    # convert the x, y columns to a pandas dataframe, the columns are shared
+    # with the dataframe rather than copied
     def _to_df(self):
-        return pd.DataFrame(self._data_series, columns=[self._x_name, self._y_name])
+        x, y = self._get_columns()
+        run_lengths = self._get_run_lengths()
+        if run_lengths is not None:
+            x = np.repeat(x, run_lengths)
+            y = np.repeat(y, run_lengths)
+        return pd.DataFrame({self._x_name: x, self._y_name: y}, copy=False)
 
     # add a new x, y datapoint as an incremental (delta) update to
     # recently collected y datapoint
@@ -76,7 +226,7 @@ class DataSeries:
     def print_series_stats(
         self, df: pd.DataFrame, plot_name: str, x_name: str = None, y_name: str = None
     ) -> None:
-        if len(self._data_series) == 0:
+        if len(self) == 0:
             return
         if x_name is None:
             x_name = self._x_name
@@ -103,7 +253,7 @@ class DataSeries:
     def print_distribution_stats(
         self, df: pd.DataFrame, plot_name: str, y_name: str = None
     ) -> None:
-        if len(self._data_series) == 0:
+        if len(self) == 0:
             return
 
         if y_name is None:
@@ -155,7 +305,7 @@ class DataSeries:
         y_cumsum: bool = True,
     ) -> None:
 
-        if len(self._data_series) == 0:
+        if len(self) == 0:
             return
 
         if y_axis_label is None:
@@ -212,7 +362,7 @@ class DataSeries:
         self._save_df(df, path, plot_name)
 
     def plot_cdf(self, path: str, plot_name: str, y_axis_label: str = None) -> None:
-        if len(self._data_series) == 0:
+        if len(self) == 0:
             return
 
         if y_axis_label is None:
@@ -256,7 +406,7 @@ class DataSeries:
         self._save_df(df, path, plot_name)
 
     def plot_histogram(self, path: str, plot_name: str) -> None:
-        if len(self._data_series) == 0:
+        if len(self) == 0:
             return
 
         df = self._to_df()
@@ -295,7 +445,7 @@ class DataSeries:
             fig.write_image(f"{path}/{plot_name}.png")
 
     def plot_differential(self, path: str, plot_name: str) -> None:
-        if len(self._data_series) == 0:
+        if len(self) == 0:
             return
 
         df = self._to_df()
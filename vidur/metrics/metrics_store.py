@@ -1,7 +1,12 @@
+import json
 import os
+import shutil
+from collections import defaultdict
+from enum import Enum
 from functools import reduce
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import plotly_express as px
 import wandb
@@ -9,7 +14,8 @@ import wandb
 from vidur.config import SimulationConfig
 from vidur.entities import Batch, BatchStage, ExecutionTime, Request
 from vidur.logger import init_logger
-from vidur.metrics.cdf_sketch import CDFSketch
+from vidur.metrics.batch_metrics_sampler import BatchMetricsSampler
+from vidur.metrics.cdf_sketch import CDFSketch, get_quantile_key
 from vidur.metrics.constants import (
     BatchMetricsCountDistribution,
     BatchMetricsTimeDistribution,
@@ -23,6 +29,7 @@ from vidur.metrics.constants import (
 )
 from vidur.metrics.data_series import DataSeries
 from vidur.metrics.series_average_meter import SeriesAverageMeter
+from vidur.metrics.slo_monitor import SLOMonitor
 from vidur.utils.mfu_calculator import MFUCalculator
 
 logger = init_logger(__name__)
@@ -40,12 +47,20 @@ REQUEST_ID_STR = "Request Id"
 COUNT_STR = "Count"
 TIME_STR = "Time (sec)"
 BATCH_ID_STR = "Batch Id"
+SAMPLE_WEIGHT_STR = "sample_weight"
 MEMORY_USAGE_STR = "Memory Usage (%)"
 BUSY_TIME_PERCENT = "Busy Time (%)"
 UTILIZATION_STR = "Utilization (%)"
 OPERATION_STR = "Operation"
 TIME_STR_MS = "Time (ms)"
 
+COMPLETED_REQUESTS_FLUSH_SIZE = 4096
+SUMMARY_QUANTILES = [0.5, 0.9, 0.95, 0.99, 0.999]
+# slo checks are decided on the quantiles of these metrics, so their summary
+# quantiles are computed exactly from the raw series instead of the sketch
+EXACT_SUMMARY_METRICS = [RequestMetricsTimeDistributions.REQUEST_SCHEDULING_DELAY]
+DEFERRED_MFU_FLUSH_SIZE = 4096
+
 
 class MetricsStore:
 
@@ -54,6 +69,14 @@ class MetricsStore:
         self._config = self._simulation_config.metrics_config
         self._last_request_arrived_at = None
 
+        # completed request records waiting to be written out
+        self._completed_requests_buffer: List[dict] = []
+
+        self._spill_dir = None
+        if self._config.write_metrics and self._config.spill_metrics:
+            self._spill_dir = f"{self._config.output_dir}/metrics_spill"
+            os.makedirs(self._spill_dir, exist_ok=True)
+
         # copy config
         self._num_replicas = self._simulation_config.cluster_config.num_replicas
         self._num_pipeline_stages = (
@@ -71,6 +94,17 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
+            )
+        # quantile sketches next to the raw series, used for summary.json
+        self._request_metrics_sketches: Dict[
+            RequestMetricsTimeDistributions, CDFSketch
+        ] = {}
+        for metric_name in RequestMetricsTimeDistributions:
+            self._request_metrics_sketches[metric_name] = CDFSketch(
+                metric_name.value,
+                self._config.save_table_to_wandb,
+                self._config.store_plots,
             )
 
         self._token_metrics_time_distribution: Dict[
@@ -91,6 +125,7 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
             )
 
         # Initialise batch metrics
@@ -112,6 +147,7 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
             )
 
         self._batch_metrics_time_distribution: Dict[
@@ -132,6 +168,7 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
             )
 
         # Initialise completion metrics
@@ -145,6 +182,7 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
             )
         self._token_completion_metrics_time_series: Dict[
             TokenCompletionMetricsTimeSeries, DataSeries
@@ -156,6 +194,7 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
             )
 
         # Initialise operation metrics
@@ -173,6 +212,7 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
             )
 
         self._cpu_operation_metrics: Dict[CpuOperationMetrics, CDFSketch] = {}
@@ -191,8 +231,22 @@ class MetricsStore:
                 self._config.subsamples,
                 self._config.save_table_to_wandb,
                 self._config.store_plots,
+                spill_file=self._get_spill_file(metric_name),
+            )
+
+        # the per batch series only keep the batches picked by the sampler
+        self._batch_metrics_sampler = None
+        if self._config.batch_metrics_max_samples:
+            self._batch_metrics_sampler = BatchMetricsSampler(
+                self._config.batch_metrics_max_samples,
+                self._num_replicas if self._config.stratify_batch_metrics else 1,
+                self._simulation_config.seed,
             )
 
+        self._slo_monitor = SLOMonitor(self._simulation_config.slo_config)
+        if not self._slo_monitor.has_targets:
+            self._slo_monitor = None
+
         # per replica metrics
         self._replica_memory_usage = []
         # per replica stage metrics
@@ -201,6 +255,15 @@ class MetricsStore:
         self._mfu_calculator = MFUCalculator(
             self._simulation_config.cluster_config.replica_configs[0]
         )
+        # finished batch stages per (replica, stage) meter whose mfu has not
+        # been computed yet
+        self._defer_mfu = (
+            self._config.defer_mfu and not self._config.utilization_sample_interval
+        )
+        self._deferred_mfu_stages: Dict[Tuple[int, int], List[BatchStage]] = (
+            defaultdict(list)
+        )
+        self._num_deferred_mfu_stages = 0
 
         for replica_idx in range(self._num_replicas):
             self._replica_memory_usage.append(
@@ -208,6 +271,7 @@ class MetricsStore:
                     TIME_STR,
                     MEMORY_USAGE_STR,
                     self._config.save_table_to_wandb,
+                    sample_interval=self._config.utilization_sample_interval,
                 )
             )
             self._replica_memory_usage[replica_idx].put(0, 0)
@@ -221,6 +285,7 @@ class MetricsStore:
                         TIME_STR,
                         BUSY_TIME_PERCENT,
                         save_table_to_wandb=self._config.save_table_to_wandb,
+                        sample_interval=self._config.utilization_sample_interval,
                     )
                 )
                 self._replica_busy_time[replica_idx][stage_idx].put(0, 0)
@@ -230,12 +295,19 @@ class MetricsStore:
                         TIME_STR,
                         UTILIZATION_STR,
                         save_table_to_wandb=self._config.save_table_to_wandb,
+                        sample_interval=self._config.utilization_sample_interval,
                     )
                 )
                 self._replica_mfu[replica_idx][stage_idx].put(0, 0)
 #update the utility and busy time for each replica in each pipeline_stage
         self._init_wandb()
 
+    def _get_spill_file(self, metric_name: Enum) -> Optional[str]:
+        if self._spill_dir is None:
+            return
+
+        return f"{self._spill_dir}/{metric_name.value}.csv"
+
     def _init_wandb(self):
         if (
             not self._config.write_metrics
@@ -341,7 +413,10 @@ class MetricsStore:
                 y_cumsum=False,
             )
             #figure out the mean processing time for each batch in each batch_metrics_count_distribution_per_batch
-        operations_dataseries_list = list(self._operation_metrics_per_batch.values())
+        operations_dataseries_list = (
+            list(self._operation_metrics_per_batch.values())
+            + self._get_sample_weight_series()
+        )
         #split by each batch
         self._save_as_csv(
             dataseries_list=operations_dataseries_list,
@@ -358,8 +433,9 @@ class MetricsStore:
                 y_axis_label=TIME_STR_MS,
                 y_cumsum=False,
             )
-        cpu_operations_dataseries_list = list(
-            self._cpu_operation_metrics_per_batch.values()
+        cpu_operations_dataseries_list = (
+            list(self._cpu_operation_metrics_per_batch.values())
+            + self._get_sample_weight_series()
         )
         self._save_as_csv(
             dataseries_list=cpu_operations_dataseries_list,
@@ -428,9 +504,11 @@ class MetricsStore:
                 y_cumsum=False,
             ),
 
-        all_batch_metrics = list(
-            self._batch_metrics_count_distribution_per_batch.values()
-        ) + list(self._batch_metrics_time_distribution_per_batch.values())
+        all_batch_metrics = (
+            list(self._batch_metrics_count_distribution_per_batch.values())
+            + list(self._batch_metrics_time_distribution_per_batch.values())
+            + self._get_sample_weight_series()
+        )
 
         self._save_as_csv(
             dataseries_list=all_batch_metrics,
@@ -461,6 +539,8 @@ class MetricsStore:
         if not self._config.store_utilization_metrics:
             return
 
+        self._flush_deferred_mfu()
+
         for replica_idx in range(self._num_replicas):
             self._replica_memory_usage[replica_idx].print_stats(
                 f"replica_{replica_idx + 1}_memory_usage", base_plot_path
@@ -475,16 +555,155 @@ class MetricsStore:
                     base_plot_path,
                 )
 
+    def _get_per_batch_series(self) -> List[DataSeries]:
+        return (
+            list(self._batch_metrics_count_distribution_per_batch.values())
+            + list(self._batch_metrics_time_distribution_per_batch.values())
+            + list(self._operation_metrics_per_batch.values())
+            + list(self._cpu_operation_metrics_per_batch.values())
+        )
+
+    def _sample_batch(self, batch_id: int, replica_id: int) -> None:
+        if self._batch_metrics_sampler is None:
+            return
+
+        stratum = replica_id - 1 if self._config.stratify_batch_metrics else 0
+        self._batch_metrics_sampler.sample(batch_id, stratum)
+
+        # bound the series to twice the sample size
+        if (
+            self._batch_metrics_sampler.num_evicted
+            >= self._config.batch_metrics_max_samples
+        ):
+            self._compact_batch_metrics()
+
+    def _is_batch_sampled(self, batch_id: int) -> bool:
+        return (
+            self._batch_metrics_sampler is None
+            or self._batch_metrics_sampler.is_sampled(batch_id)
+        )
+
+    def _compact_batch_metrics(self) -> None:
+        sampled_batch_ids = self._batch_metrics_sampler.get_sampled_batch_ids()
+        for dataseries in self._get_per_batch_series():
+            dataseries.filter_x(sampled_batch_ids)
+
+    def _get_sample_weight_series(self) -> List[DataSeries]:
+        if self._batch_metrics_sampler is None:
+            return []
+
+        sample_weights = DataSeries(
+            BATCH_ID_STR,
+            SAMPLE_WEIGHT_STR,
+            self._config.subsamples,
+            self._config.save_table_to_wandb,
+            self._config.store_plots,
+        )
+        for batch_id, weight in sorted(
+            self._batch_metrics_sampler.get_weights().items()
+        ):
+            sample_weights.put(batch_id, weight)
+        return [sample_weights]
+
+    def get_summary(
+        self, quantiles: List[float] = SUMMARY_QUANTILES
+    ) -> Dict[str, Dict[str, float]]:
+        sketches = (
+            list(self._request_metrics_sketches.values())
+            + list(self._token_metrics_time_distribution.values())
+            + list(self._batch_metrics_time_distribution.values())
+        )
+        summary = {
+            sketch._metric_name: sketch.get_summary(quantiles)
+            for sketch in sketches
+            if len(sketch)
+        }
+
+        for metric_name in EXACT_SUMMARY_METRICS:
+            if metric_name.value not in summary:
+                continue
+
+            values = self._request_metrics_time_distributions[metric_name]._to_df()[
+                metric_name.value
+            ]
+            for quantile in quantiles:
+                summary[metric_name.value][get_quantile_key(quantile)] = float(
+                    values.quantile(quantile)
+                )
+
+        return summary
+
+    @if_write_metrics
+    def store_summary(
+        self, quantiles: List[float] = SUMMARY_QUANTILES
+    ) -> Dict[str, Dict[str, float]]:
+        # percentiles of the main latency metrics in one small file, so that
+        # readers do not have to load the per request csvs
+        if self._slo_monitor is not None:
+            # readers check the slo quantiles against the targets
+            quantiles = sorted(set(quantiles) | set(self._slo_monitor.quantiles))
+        summary = self.get_summary(quantiles)
+
+        with open(f"{self._config.output_dir}/summary.json", "w") as f:
+            if self._slo_monitor is None:
+                json.dump(summary, f, indent=4)
+            else:
+                json.dump({**summary, "slo": self._slo_monitor.to_dict()}, f, indent=4)
+
+        return summary
+
+    def _flush_completed_requests(self) -> None:
+        if not self._completed_requests_buffer:
+            return
+
+        file_path = f"{self._config.output_dir}/completed_requests.csv"
+        pd.DataFrame(self._completed_requests_buffer).to_csv(
+            file_path,
+            mode="a",
+            header=not os.path.exists(file_path),
+            index=False,
+        )
+        self._completed_requests_buffer = []
+
     @if_write_metrics
     def plot(self) -> None:
+        self._flush_completed_requests()
+
         dir_plot_path = f"{self._config.output_dir}/plots"
         os.makedirs(dir_plot_path, exist_ok=True)
 
+        if self._batch_metrics_sampler is not None:
+            self._compact_batch_metrics()
+
         self._store_request_metrics(dir_plot_path)
         self._store_batch_metrics(dir_plot_path)
         self._store_completion_metrics(dir_plot_path)
         self._store_operation_metrics(dir_plot_path)
         self._store_utilization_metrics(dir_plot_path)
+        self.store_summary()
+
+        # everything that was spilled is part of the written metrics now
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir)
+
+    @if_write_metrics
+    def store_execution_time_cache_stats(self, hits: int, misses: int) -> None:
+        num_lookups = hits + misses
+        stats = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / num_lookups if num_lookups else 0,
+        }
+
+        if wandb.run:
+            wandb.log(
+                {f"execution_time_cache_{key}": value for key, value in stats.items()},
+                step=0,
+            )
+
+        stats_file = f"{self._config.output_dir}/execution_time_cache_stats.json"
+        with open(stats_file, "w") as f:
+            json.dump(stats, f, indent=4)
 
     @if_write_metrics
     def on_request_arrival(self, time: float, request: Request) -> None:
@@ -513,8 +732,34 @@ class MetricsStore:
             ].put(request.id, request.arrived_at - self._last_request_arrived_at)
         self._last_request_arrived_at = request.arrived_at
 
+    @property
+    def slo_verdict(self) -> Optional[bool]:
+        if self._slo_monitor is None:
+            return None
+        return self._slo_monitor.verdict
+
+    def on_all_requests_arrived(self, num_requests: int) -> None:
+        if self._slo_monitor is not None:
+            self._slo_monitor.on_all_requests_arrived(num_requests)
+
+    def _push_request_metric(
+        self,
+        metric_name: RequestMetricsTimeDistributions,
+        request_id: int,
+        value: float,
+    ) -> None:
+        self._request_metrics_time_distributions[metric_name].put(request_id, value)
+        self._request_metrics_sketches[metric_name].put(value)
+        if self._slo_monitor is not None:
+            self._slo_monitor.observe(metric_name, value)
+
     @if_write_metrics
     def _on_request_end(self, time: float, request: Request) -> None:
+        if self._config.stream_completed_requests:
+            self._completed_requests_buffer.append(request.to_dict())
+            if len(self._completed_requests_buffer) >= COMPLETED_REQUESTS_FLUSH_SIZE:
+                self._flush_completed_requests()
+
         if not self._config.store_request_metrics:
             return
 
@@ -522,56 +767,75 @@ class MetricsStore:
             RequestCompletionMetricsTimeSeries.REQUEST_COMPLETION
         ].put(request.completed_at, 1)
 
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_E2E_TIME
-        ].put(request.id, request.e2e_time)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_E2E_TIME_NORMALIZED
-        ].put(request.id, request.e2e_time_normalized)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_EXECUTION_TIME
-        ].put(request.id, request.execution_time)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_EXECUTION_TIME_NORMALIZED
-        ].put(request.id, request.execution_time_normalized)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_MODEL_EXECUTION_TIME
-        ].put(request.id, request.model_execution_time)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_MODEL_EXECUTION_TIME_NORMALIZED
-        ].put(request.id, request.model_execution_time_normalized)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_PREEMPTION_TIME
-        ].put(request.id, request.preempted_time)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_SCHEDULING_DELAY
-        ].put(request.id, request.scheduling_delay)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_EXECUTION_PLUS_PREEMPTION_TIME
-        ].put(request.id, request.execution_time + request.preempted_time)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.REQUEST_EXECUTION_PLUS_PREEMPTION_TIME_NORMALIZED
-        ].put(
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_E2E_TIME,
+            request.id,
+            request.e2e_time,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_E2E_TIME_NORMALIZED,
+            request.id,
+            request.e2e_time_normalized,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_EXECUTION_TIME,
+            request.id,
+            request.execution_time,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_EXECUTION_TIME_NORMALIZED,
+            request.id,
+            request.execution_time_normalized,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_MODEL_EXECUTION_TIME,
+            request.id,
+            request.model_execution_time,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_MODEL_EXECUTION_TIME_NORMALIZED,
+            request.id,
+            request.model_execution_time_normalized,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_PREEMPTION_TIME,
+            request.id,
+            request.preempted_time,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_SCHEDULING_DELAY,
+            request.id,
+            request.scheduling_delay,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_EXECUTION_PLUS_PREEMPTION_TIME,
+            request.id,
+            request.execution_time + request.preempted_time,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.REQUEST_EXECUTION_PLUS_PREEMPTION_TIME_NORMALIZED,
             request.id,
             (request.execution_time + request.preempted_time)
             / request.num_decode_tokens,
         )
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.PREFILL_TIME_E2E
-        ].put(request.id, request.prefill_completed_at - request.arrived_at)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.PREFILL_TIME_EXECUTION_PLUS_PREEMPTION
-        ].put(request.id, request.prefill_completed_at - request.scheduled_at)
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.PREFILL_TIME_EXECUTION_PLUS_PREEMPTION_NORMALIZED
-        ].put(
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.PREFILL_TIME_E2E,
+            request.id,
+            request.prefill_completed_at - request.arrived_at,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.PREFILL_TIME_EXECUTION_PLUS_PREEMPTION,
+            request.id,
+            request.prefill_completed_at - request.scheduled_at,
+        )
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.PREFILL_TIME_EXECUTION_PLUS_PREEMPTION_NORMALIZED,
             request.id,
             (request.prefill_completed_at - request.scheduled_at)
             / request.num_prefill_tokens,
         )
-        self._request_metrics_time_distributions[
-            RequestMetricsTimeDistributions.DECODE_TIME_EXECUTION_PLUS_PREEMPTION_NORMALIZED
-        ].put(
+        self._push_request_metric(
+            RequestMetricsTimeDistributions.DECODE_TIME_EXECUTION_PLUS_PREEMPTION_NORMALIZED,
             request.id,
             (request.completed_at - request.prefill_completed_at)
             / request.num_decode_tokens,
@@ -600,44 +864,68 @@ class MetricsStore:
         if not request.has_started_decode:
             return
 
+        decode_token_time = (
+            time - batch.scheduled_at + request.latest_iteration_scheduling_delay
+        )
+        if self._slo_monitor is not None:
+            self._slo_monitor.observe(
+                TokenMetricsTimeDistribution.DECODE_TOKEN_EXECUTION_PLUS_PREMPTION_TIME,
+                decode_token_time,
+            )
+
         if not self._config.store_token_completion_metrics:
             return
 
         self._token_metrics_time_distribution[
             TokenMetricsTimeDistribution.DECODE_TOKEN_EXECUTION_PLUS_PREMPTION_TIME
-        ].put(
-            time - batch.scheduled_at + request.latest_iteration_scheduling_delay,
-        )
+        ].put(decode_token_time)
 
         self._token_completion_metrics_time_series[
             TokenCompletionMetricsTimeSeries.DECODE_COMPLETIONS
         ].put(time, 1)
 
     def _push_metric(
-        self, metric_name: OperationMetrics, batch_id: int, value: float
+        self,
+        metric_name: OperationMetrics,
+        batch_id: int,
+        value: float,
+        count: int = 1,
     ) -> None:
         if metric_name in OperationMetrics:
-            self._operation_metrics[metric_name].put(value)
-            self._operation_metrics_per_batch[metric_name].put(batch_id, value)
+            self._operation_metrics[metric_name].put(value, count)
+            per_batch_series = self._operation_metrics_per_batch[metric_name]
         elif metric_name in CpuOperationMetrics:
-            self._cpu_operation_metrics[metric_name].put(value)
-            self._cpu_operation_metrics_per_batch[metric_name].put(batch_id, value)
+            self._cpu_operation_metrics[metric_name].put(value, count)
+            per_batch_series = self._cpu_operation_metrics_per_batch[metric_name]
         elif metric_name in BatchMetricsTimeDistribution:
-            self._batch_metrics_time_distribution[metric_name].put(value)
-            self._batch_metrics_time_distribution_per_batch[metric_name].put(
-                batch_id, value
-            )
+            self._batch_metrics_time_distribution[metric_name].put(value, count)
+            per_batch_series = self._batch_metrics_time_distribution_per_batch[
+                metric_name
+            ]
         elif metric_name in BatchMetricsCountDistribution:
-            self._batch_metrics_count_distribution[metric_name].put(value)
-            self._batch_metrics_count_distribution_per_batch[metric_name].put(
-                batch_id, value
-            )
+            self._batch_metrics_count_distribution[metric_name].put(value, count)
+            per_batch_series = self._batch_metrics_count_distribution_per_batch[
+                metric_name
+            ]
         else:
             raise ValueError(f"Invalid metric name {metric_name}")
 
+        # the distributions see every batch, the per batch series only the
+        # sampled ones
+        if self._is_batch_sampled(batch_id):
+            per_batch_series.put(batch_id, value, count)
+
     @if_write_metrics
     def on_batch_end(
         self, time: float, batch: Batch, replica_id: int, memory_usage_percent: int
+    ) -> None:
+        self._on_batch_end(time, batch, replica_id, memory_usage_percent)
+
+        if self._batch_metrics_sampler is not None:
+            self._batch_metrics_sampler.release(batch.id)
+
+    def _on_batch_end(
+        self, time: float, batch: Batch, replica_id: int, memory_usage_percent: int
     ) -> None:
         if (
             self._config.min_batch_index and batch.id < self._config.min_batch_index
@@ -656,6 +944,7 @@ class MetricsStore:
         if not self._config.store_batch_metrics:
             return
 
+        self._sample_batch(batch.id, replica_id)
         self._push_metric(
             BatchMetricsTimeDistribution.BATCH_EXECUTION_TIME,
             batch.id,
@@ -702,86 +991,109 @@ class MetricsStore:
             return
 
         self._replica_busy_time[replica_id - 1][stage_id - 1].put(time, 100)
-        mfu = self._mfu_calculator.get_mfu(batch_stage)
-        self._replica_mfu[replica_id - 1][stage_id - 1].put(time, mfu)
+        if self._defer_mfu:
+            # the mfu is folded in after the stage ends
+            self._replica_mfu[replica_id - 1][stage_id - 1].put(time, 0)
+        else:
+            mfu = self._mfu_calculator.get_mfu(batch_stage)
+            self._replica_mfu[replica_id - 1][stage_id - 1].put(time, mfu)
 
         if not self._config.store_operation_metrics:
             return
 
         batch_id = batch_stage._batch_id
-        for _ in range(execution_time.num_layers):
-            self._push_metric(
-                OperationMetrics.MLP_UP_PROJ,
-                batch_id,
-                execution_time.mlp_layer_up_proj_execution_time,
-            )
-            self._push_metric(
-                OperationMetrics.MLP_ACTIVATION,
-                batch_id,
-                execution_time.mlp_layer_act_execution_time,
-            )
-            self._push_metric(
-                OperationMetrics.MLP_DOWN_PROJ,
-                batch_id,
-                execution_time.mlp_layer_down_proj_execution_time,
-            )
-            self._push_metric(
-                OperationMetrics.MLP_DOWN_PROJ_ALL_REDUCE,
-                batch_id,
-                execution_time.mlp_all_reduce_time,
-            )
-            self._push_metric(
-                OperationMetrics.ATTN_PRE_PROJ,
-                batch_id,
-                execution_time.attention_pre_proj_time,
-            )
-            self._push_metric(
-                OperationMetrics.ATTN_POST_PROJ,
-                batch_id,
-                execution_time.attention_post_proj_time,
-            )
-            self._push_metric(
-                OperationMetrics.ATTN_POST_PROJ_ALL_REDUCE,
-                batch_id,
-                execution_time.attention_all_reduce_time,
-            )
-
-            if execution_time.attention_prefill_execution_time != 0:
-                self._push_metric(
-                    OperationMetrics.ATTN_PREFILL,
-                    batch_id,
-                    execution_time.attention_prefill_execution_time,
-                )
+        self._sample_batch(batch_id, replica_id)
+        # every layer reports the same times, push each once weighted by the
+        # layer count instead of once per layer
+        num_layers = execution_time.num_layers
+        self._push_metric(
+            OperationMetrics.MLP_UP_PROJ,
+            batch_id,
+            execution_time.mlp_layer_up_proj_execution_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.MLP_ACTIVATION,
+            batch_id,
+            execution_time.mlp_layer_act_execution_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.MLP_DOWN_PROJ,
+            batch_id,
+            execution_time.mlp_layer_down_proj_execution_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.MLP_DOWN_PROJ_ALL_REDUCE,
+            batch_id,
+            execution_time.mlp_all_reduce_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.ATTN_PRE_PROJ,
+            batch_id,
+            execution_time.attention_pre_proj_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.ATTN_POST_PROJ,
+            batch_id,
+            execution_time.attention_post_proj_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.ATTN_POST_PROJ_ALL_REDUCE,
+            batch_id,
+            execution_time.attention_all_reduce_time,
+            num_layers,
+        )
 
-            if execution_time.attention_decode_execution_time != 0:
-                self._push_metric(
-                    OperationMetrics.ATTN_DECODE,
-                    batch_id,
-                    execution_time.attention_decode_execution_time,
-                )
-            self._push_metric(
-                OperationMetrics.ATTN_KV_CACHE_SAVE,
-                batch_id,
-                execution_time.attention_kv_cache_save_execution_time,
-            )
-            self._push_metric(
-                OperationMetrics.ATTN_ROPE,
-                batch_id,
-                execution_time.attention_rope_execution_time,
-            )
+        if execution_time.attention_prefill_execution_time != 0:
             self._push_metric(
-                OperationMetrics.ADD, batch_id, execution_time.add_time * 2
-            )
-            self._push_metric(
-                OperationMetrics.INPUT_LAYERNORM,
+                OperationMetrics.ATTN_PREFILL,
                 batch_id,
-                execution_time.attn_norm_time,
+                execution_time.attention_prefill_execution_time,
+                num_layers,
             )
+
+        if execution_time.attention_decode_execution_time != 0:
             self._push_metric(
-                OperationMetrics.POST_ATTENTION_LAYERNORM,
+                OperationMetrics.ATTN_DECODE,
                 batch_id,
-                execution_time.mlp_norm_time,
+                execution_time.attention_decode_execution_time,
+                num_layers,
             )
+        self._push_metric(
+            OperationMetrics.ATTN_KV_CACHE_SAVE,
+            batch_id,
+            execution_time.attention_kv_cache_save_execution_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.ATTN_ROPE,
+            batch_id,
+            execution_time.attention_rope_execution_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.ADD,
+            batch_id,
+            execution_time.add_time * 2,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.INPUT_LAYERNORM,
+            batch_id,
+            execution_time.attn_norm_time,
+            num_layers,
+        )
+        self._push_metric(
+            OperationMetrics.POST_ATTENTION_LAYERNORM,
+            batch_id,
+            execution_time.mlp_norm_time,
+            num_layers,
+        )
 
         self._push_metric(
             OperationMetrics.PIPELINE_SEND_RECV,
@@ -821,3 +1133,30 @@ class MetricsStore:
             return
         self._replica_busy_time[replica_id - 1][stage_id - 1].put(time, 0)
         self._replica_mfu[replica_id - 1][stage_id - 1].put(time, 0)
+
+        if self._defer_mfu:
+            self._deferred_mfu_stages[(replica_id - 1, stage_id - 1)].append(
+                batch_stage
+            )
+            self._num_deferred_mfu_stages += 1
+            if self._num_deferred_mfu_stages >= DEFERRED_MFU_FLUSH_SIZE:
+                self._flush_deferred_mfu()
+
+    def _flush_deferred_mfu(self) -> None:
+        for (replica_idx, stage_idx), batch_stages in self._deferred_mfu_stages.items():
+            mfus = self._mfu_calculator.get_mfus(batch_stages)
+            # like the meter, skip segments that start at time 0
+            segments = np.array(
+                [
+                    (
+                        batch_stage.completed_at - batch_stage.scheduled_at
+                        if batch_stage.scheduled_at
+                        else 0
+                    )
+                    for batch_stage in batch_stages
+                ]
+            )
+            self._replica_mfu[replica_idx][stage_idx].put_deferred(mfus, segments)
+
+        self._deferred_mfu_stages.clear()
+        self._num_deferred_mfu_stages = 0
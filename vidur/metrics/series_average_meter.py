@@ -1,5 +1,8 @@
 import json
+from typing import List, Tuple
 
+import numpy as np
+import pandas as pd
 import wandb
 
 from vidur.logger import init_logger
@@ -14,6 +17,7 @@ class SeriesAverageMeter:
         y_name: str,
         use_weighted_mean: bool = True,
         save_table_to_wandb: bool = True,
+        sample_interval: float = 0,
     ) -> None:
         # column names of x, y datatpoints for data collection
         self._x_name = x_name
@@ -30,6 +34,14 @@ class SeriesAverageMeter:
         self._last_data_y = None
         self._last_data_x = None
 
+        # optional downsampled time series, the time weighted mean over every
+        # fixed interval of x, so memory grows with x and not with the puts
+        self._sample_interval = sample_interval
+        self._samples: List[Tuple[float, float]] = []
+        self._sample_idx = 0
+        self._sample_numer_sum = 0
+        self._sample_denom_sum = 0
+
     def _update_simple_mean(self, data_y: float) -> None:
         self._denom_sum += 1
         self._numer_sum += data_y
@@ -45,8 +57,39 @@ class SeriesAverageMeter:
         # Add the time difference to the total time
         self._denom_sum += x_diff
 
+    def _close_sample(self) -> None:
+        if self._sample_denom_sum:
+            self._samples.append(
+                (
+                    self._sample_idx * self._sample_interval,
+                    self._sample_numer_sum / self._sample_denom_sum,
+                )
+            )
+        self._sample_idx += 1
+        self._sample_numer_sum = 0
+        self._sample_denom_sum = 0
+
+    def _update_samples(self, data_x: float) -> None:
+        if self._last_data_x is None:
+            return
+
+        segment_start = self._last_data_x
+        sample_end = (self._sample_idx + 1) * self._sample_interval
+        while data_x >= sample_end:
+            self._sample_numer_sum += self._last_data_y * (sample_end - segment_start)
+            self._sample_denom_sum += sample_end - segment_start
+            self._close_sample()
+            segment_start = sample_end
+            sample_end = (self._sample_idx + 1) * self._sample_interval
+
+        self._sample_numer_sum += self._last_data_y * (data_x - segment_start)
+        self._sample_denom_sum += data_x - segment_start
+
     # add a new x, y datapoint
     def put(self, data_x: float, data_y: float) -> None:
+        if self._sample_interval:
+            self._update_samples(data_x)
+
         if self._use_weighted_mean:
             self._update_weighted_mean(data_x)
         else:
@@ -57,6 +100,20 @@ class SeriesAverageMeter:
         self._min_y = min(self._min_y, data_y)
         self._max_y = max(self._max_y, data_y)
 
+    # fold in datapoints that were put with a y of 0 as their y was not known
+    # yet, weights are the segment lengths each of them was held for
+    def put_deferred(self, data_ys: np.ndarray, weights: np.ndarray) -> None:
+        assert self._use_weighted_mean
+
+        if not len(data_ys):
+            return
+
+        # cumsum adds up in order, the same way the puts would have
+        self._numer_sum = np.cumsum(
+            np.concatenate(([self._numer_sum], data_ys * weights))
+        )[-1].item()
+        self._max_y = max(self._max_y, data_ys.max().item())
+
     # get most recently collected y datapoint
     def _peek_y(self):
         return self._last_data_y
@@ -90,6 +147,9 @@ class SeriesAverageMeter:
         with open(f"{path}/{name}.json", "w") as f:
             json.dump(stats_dict, f)
 
+        if self._sample_interval:
+            self._save_samples(name, path)
+
         if wandb.run:
             wandb.log(
                 {
@@ -99,3 +159,20 @@ class SeriesAverageMeter:
                 },
                 step=0,
             )
+
+    def _save_samples(self, name: str, path: str) -> None:
+        # the last interval is only covered up to the last datapoint
+        samples = list(self._samples)
+        if self._sample_denom_sum:
+            samples.append(
+                (
+                    self._sample_idx * self._sample_interval,
+                    self._sample_numer_sum / self._sample_denom_sum,
+                )
+            )
+
+        df = pd.DataFrame(samples, columns=[self._x_name, self._y_name])
+        df.to_csv(f"{path}/{name}_time_series.csv")
+
+        if wandb.run and self._save_table_to_wandb:
+            wandb.log({f"{name}_time_series_table": wandb.Table(dataframe=df)}, step=0)
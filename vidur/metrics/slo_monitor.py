@@ -0,0 +1,187 @@
+import math
+from enum import Enum
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional
+
+from vidur.config import SloConfig
+from vidur.metrics.constants import (
+    RequestMetricsTimeDistributions,
+    TokenMetricsTimeDistribution,
+)
+
+
+class SLOTarget:
+    """
+    Online check of `quantile(metric) <= value` over a streamed metric. The
+    verdict is final once set: True when the SLO is met, False when it is
+    violated.
+
+    With the final number of values known, the verdict is exact as soon as the
+    values that exceed the SLO either push the quantile (by rank, as in
+    pandas) over it or can no longer do so. With a `confidence`, a violation is
+    also declared when the Wilson lower bound of the exceedance probability is
+    above `1 - quantile`. That test treats the values as independent, which
+    queueing delays are not, so it is opt-in. Compliance is never declared
+    statistically, as delays grow over an overloaded run and early values
+    understate them.
+    """
+
+    def __init__(
+        self,
+        value: float,
+        quantile: float,
+        confidence: Optional[float],
+        min_samples: int,
+    ) -> None:
+        self._value = value
+        self._quantile = quantile
+        # no statistical verdicts without a confidence
+        self._z = None if confidence is None else NormalDist().inv_cdf(confidence)
+        self._min_samples = min_samples
+
+        self._num_observations = 0
+        self._num_violations = 0
+        # set once the final number of values is known
+        self._num_remaining = None
+        self._max_num_violations_met = None
+        self._min_num_violations_violated = None
+        self.verdict: Optional[bool] = None
+
+    @property
+    def quantile(self) -> float:
+        return self._quantile
+
+    def set_num_expected(self, num_expected: int) -> None:
+        # the rank of the quantile in the final sorted values
+        rank = self._quantile * (num_expected - 1)
+        self._max_num_violations_met = num_expected - 1 - math.ceil(rank)
+        self._min_num_violations_violated = num_expected - math.floor(rank)
+        self._num_remaining = num_expected - self._num_observations
+        if self.verdict is None:
+            self._update_exact_verdict()
+
+    def observe(self, value: float) -> None:
+        if self.verdict is not None:
+            return
+
+        self._num_observations += 1
+        if self._num_remaining is not None:
+            self._num_remaining -= 1
+
+        if value > self._value:
+            self._num_violations += 1
+            if not self._update_exact_verdict():
+                self._update_statistical_verdict()
+        elif self._max_num_violations_met is not None:
+            self._update_exact_verdict()
+
+    def _update_exact_verdict(self) -> bool:
+        if self._max_num_violations_met is None:
+            return False
+
+        if self._num_violations >= self._min_num_violations_violated:
+            self.verdict = False
+        elif self._num_violations + self._num_remaining <= self._max_num_violations_met:
+            self.verdict = True
+
+        return self.verdict is not None
+
+    def _update_statistical_verdict(self) -> None:
+        n = self._num_observations
+        if self._z is None or n < self._min_samples:
+            return
+
+        # wilson score interval of the probability of exceeding the slo
+        p = self._num_violations / n
+        z2 = self._z * self._z
+        center = p + z2 / (2 * n)
+        margin = self._z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n))
+        lower_bound = (center - margin) / (1 + z2 / n)
+
+        if lower_bound > 1 - self._quantile:
+            self.verdict = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "value": self._value,
+            "quantile": self._quantile,
+            "num_observations": self._num_observations,
+            "num_violations": self._num_violations,
+            "verdict": self.verdict,
+        }
+
+
+class SLOMonitor:
+    """
+    Tracks the configured SLOs while the simulation runs. The verdict is False
+    as soon as any SLO is violated and True once all of them are met.
+    """
+
+    def __init__(self, config: SloConfig) -> None:
+        self.verdict: Optional[bool] = None
+        self._targets: Dict[Enum, SLOTarget] = {}
+        for metric_name, value, quantile in [
+            (
+                RequestMetricsTimeDistributions.REQUEST_SCHEDULING_DELAY,
+                config.scheduling_delay_value,
+                config.scheduling_delay_quantile,
+            ),
+            (
+                RequestMetricsTimeDistributions.PREFILL_TIME_E2E,
+                config.ttft_value,
+                config.ttft_quantile,
+            ),
+            (
+                TokenMetricsTimeDistribution.DECODE_TOKEN_EXECUTION_PLUS_PREMPTION_TIME,
+                config.tbt_value,
+                config.tbt_quantile,
+            ),
+        ]:
+            if value is None:
+                continue
+            self._targets[metric_name] = SLOTarget(
+                value,
+                quantile,
+                config.confidence,
+                config.min_samples,
+            )
+
+    @property
+    def has_targets(self) -> bool:
+        return len(self._targets) > 0
+
+    @property
+    def quantiles(self) -> List[float]:
+        return [target.quantile for target in self._targets.values()]
+
+    def _update_verdict(self) -> None:
+        verdicts = [target.verdict for target in self._targets.values()]
+        if False in verdicts:
+            self.verdict = False
+        elif None not in verdicts:
+            self.verdict = True
+
+    def observe(self, metric_name: Enum, value: float) -> None:
+        target = self._targets.get(metric_name)
+        if target is None or target.verdict is not None:
+            return
+
+        target.observe(value)
+        if target.verdict is not None:
+            self._update_verdict()
+
+    def on_all_requests_arrived(self, num_requests: int) -> None:
+        # every request reports the request level metrics exactly once
+        for metric_name, target in self._targets.items():
+            if metric_name in RequestMetricsTimeDistributions:
+                target.set_num_expected(num_requests)
+        self._update_verdict()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "verdict": self.verdict,
+            "targets": {
+                metric_name.value: target.to_dict()
+                for metric_name, target in self._targets.items()
+            },
+        }
@@ -1,6 +1,6 @@
 import json
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List
 
 from vidur.config import BaseRequestGeneratorConfig
 from vidur.entities import Request
@@ -18,3 +18,8 @@ class BaseRequestGenerator(ABC):
     def generate(self) -> List[Request]:
         requests = self.generate_requests()
         return requests
+
+    def iter_requests(self) -> Iterator[Request]:
+        # requests must be yielded in non-decreasing order of arrival time,
+        # generators that can produce requests lazily should override this
+        yield from self.generate()
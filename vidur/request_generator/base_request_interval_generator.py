@@ -1,5 +1,8 @@
+import random
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from vidur.config import BaseRequestIntervalGeneratorConfig
 
 
@@ -7,6 +10,14 @@ class BaseRequestIntervalGenerator(ABC):
 
     def __init__(self, config: BaseRequestIntervalGeneratorConfig):
         self.config = config
+        self.rng = random.Random(config.seed)
+        self.np_rng = np.random.RandomState(config.seed)
+
+    def set_rng(self, rng: random.Random, np_rng: np.random.RandomState) -> None:
+        # the request generator shares one rng between its interval and length
+        # generators
+        self.rng = rng
+        self.np_rng = np_rng
 
     @abstractmethod
     def get_next_inter_request_time(self) -> float:
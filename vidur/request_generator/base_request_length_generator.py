@@ -1,6 +1,9 @@
+import random
 from abc import ABC, abstractmethod
 from typing import Tuple
 
+import numpy as np
+
 from vidur.config import BaseRequestLengthGeneratorConfig
 
 
@@ -8,6 +11,14 @@ class BaseRequestLengthGenerator(ABC):
 
     def __init__(self, config: BaseRequestLengthGeneratorConfig):
         self.config = config
+        self.rng = random.Random(config.seed)
+        self.np_rng = np.random.RandomState(config.seed)
+
+    def set_rng(self, rng: random.Random, np_rng: np.random.RandomState) -> None:
+        # the request generator shares one rng between its interval and length
+        # generators
+        self.rng = rng
+        self.np_rng = np_rng
 
     @abstractmethod
     def get_next_num_tokens(self) -> Tuple[float, float]:
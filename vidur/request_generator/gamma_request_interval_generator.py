@@ -17,4 +17,4 @@ class GammaRequestIntervalGenerator(BaseRequestIntervalGenerator):
 
     def get_next_inter_request_time(self) -> float:
         gamma_scale = 1.0 / (self.qps * self.gamma_shape)
-        return gamma.rvs(self.gamma_shape, scale=gamma_scale)
+        return gamma.rvs(self.gamma_shape, scale=gamma_scale, random_state=self.np_rng)
@@ -1,5 +1,4 @@
 import math
-import random
 
 from vidur.config import PoissonRequestIntervalGeneratorConfig
 from vidur.request_generator.base_request_interval_generator import (
@@ -17,7 +16,7 @@ class PoissonRequestIntervalGenerator(BaseRequestIntervalGenerator):
         self.max_interval = self.std * 3.0
 
     def get_next_inter_request_time(self) -> float:
-        next_interval = -math.log(1.0 - random.random()) / self.qps
+        next_interval = -math.log(1.0 - self.rng.random()) / self.qps
         next_interval = min(next_interval, self.max_interval)
 
         return next_interval
@@ -1,4 +1,7 @@
-from typing import List
+import random
+from typing import Iterator, List
+
+import numpy as np
 
 from vidur.config import SyntheticRequestGeneratorConfig
 from vidur.entities import Request
@@ -10,7 +13,6 @@ from vidur.request_generator.request_length_generator_registry import (
     RequestLengthGeneratorRegistry,
 )
 from vidur.types import RequestIntervalGeneratorType
-from vidur.utils.random import set_seeds
 
 
 class SyntheticRequestGenerator(BaseRequestGenerator):
@@ -49,38 +51,7 @@ class SyntheticRequestGenerator(BaseRequestGenerator):
             num_decode_tokens=int(decode_tokens),
         )
 
-    def _generate_requests(self) -> List[Request]:
-        requests = []
-
-        current_time = 0
-
-        # first priority is duration
-        if self.config.duration is not None:
-            while current_time < self.config.duration:
-                request = self._generate_next_request(current_time)
-                current_time = request.arrived_at
-                requests.append(request)
-        elif self.config.num_requests is not None:
-            for _ in range(self.config.num_requests):
-                request = self._generate_next_request(current_time)
-                current_time = request.arrived_at
-                requests.append(request)
-        else:
-            assert (
-                self.config.interval_generator_config.get_type()
-                == RequestIntervalGeneratorType.TRACE
-            )
-
-            while True:
-                request = self._generate_next_request(current_time)
-                if request is None:
-                    break
-                current_time = request.arrived_at
-                requests.append(request)
-
-        return requests
-
-    def generate_requests(self) -> List[Request]:
+    def iter_requests(self) -> Iterator[Request]:
         assert (
             self.config.duration
             or self.config.num_requests
@@ -88,18 +59,41 @@ class SyntheticRequestGenerator(BaseRequestGenerator):
             == RequestIntervalGeneratorType.TRACE
         )
 
-        set_seeds(self.config.seed)
+        # requests are drawn while the simulation is running, so the generators
+        # draw from their own rngs and leave the global ones untouched
+        rng = random.Random(self.config.seed)
+        np_rng = np.random.RandomState(self.config.seed)
+        self.request_interval_generator.set_rng(rng, np_rng)
+        self.request_length_generator.set_rng(rng, np_rng)
 
-        requests = self._generate_requests()
+        current_time = 0
+        num_requests = 0
 
-        # sort requests by arrival time
-        requests.sort(key=lambda x: x.arrived_at)
-        # remove any requests that arrived after the time limit
-        if self.config.duration is not None:
-            requests = [
-                request
-                for request in requests
-                if request.arrived_at < self.config.duration
-            ]
+        while True:
+            # first priority is duration
+            if self.config.duration is not None:
+                if current_time >= self.config.duration:
+                    break
+            elif self.config.num_requests is not None:
+                if num_requests >= self.config.num_requests:
+                    break
+
+            request = self._generate_next_request(current_time)
+
+            if request is None:
+                break
 
-        return requests
+            current_time = request.arrived_at
+            num_requests += 1
+
+            # remove any requests that arrived after the time limit
+            if (
+                self.config.duration is not None
+                and request.arrived_at >= self.config.duration
+            ):
+                break
+
+            yield request
+
+    def generate_requests(self) -> List[Request]:
+        return list(self.iter_requests())
@@ -1,92 +1,156 @@
 import logging
-from typing import List
+import os
+from typing import Iterator, List
 
+import numpy as np
 import pandas as pd
 
+from vidur.cache import ArtifactCache, get_file_digest
 from vidur.config import TraceRequestGeneratorConfig
 from vidur.entities import Request
 from vidur.request_generator.base_request_generator import BaseRequestGenerator
 
 logger = logging.getLogger(__name__)
 
+TRACE_COLUMNS_DTYPE = np.dtype(
+    [
+        ("arrived_at", np.float64),
+        ("num_prefill_tokens", np.int64),
+        ("num_decode_tokens", np.int64),
+    ]
+)
+
 
 class TraceReplayRequestGenerator(BaseRequestGenerator):
     """
     Reads a trace csv file containing request arrival time, its prompt and completion token values to generate
-    inter-request times, number of tokens.
+    inter-request times, number of tokens. The trace file is read in chunks of `chunk_size` rows and normalized into
+    compact columns sorted by arrival time, which are cached as a memory mapped `.npy` artifact keyed on the trace file
+    contents and the scale factors.
     """
 
     def __init__(self, config: TraceRequestGeneratorConfig):
         super().__init__(config)
 
-        # load into a pd dataframe
-        self.trace_df = pd.read_csv(config.trace_file)
+        logger.info(f"Streaming trace file {config.trace_file}")
+
+    def _process_trace_chunk(self, trace_df: pd.DataFrame) -> pd.DataFrame:
+        config = self.config
 
         # scale prefill and decode tokens
-        self.trace_df["num_prefill_tokens"] = (
-            self.trace_df["num_prefill_tokens"] * config.prefill_scale_factor
+        trace_df["num_prefill_tokens"] = (
+            trace_df["num_prefill_tokens"] * config.prefill_scale_factor
         )
-        self.trace_df["num_decode_tokens"] = (
-            self.trace_df["num_decode_tokens"] * config.decode_scale_factor
+        trace_df["num_decode_tokens"] = (
+            trace_df["num_decode_tokens"] * config.decode_scale_factor
         )
 
         # make sure all the prefill and decode counts are integers
-        self.trace_df["num_prefill_tokens"] = self.trace_df[
-            "num_prefill_tokens"
-        ].astype(int)
-        self.trace_df["num_decode_tokens"] = self.trace_df["num_decode_tokens"].astype(
-            int
-        )
+        trace_df["num_prefill_tokens"] = trace_df["num_prefill_tokens"].astype(int)
+        trace_df["num_decode_tokens"] = trace_df["num_decode_tokens"].astype(int)
 
         # make sure that there is at least one prefill and decode token
-        self.trace_df["num_prefill_tokens"] = self.trace_df["num_prefill_tokens"].clip(
-            lower=1
-        )
-        self.trace_df["num_decode_tokens"] = self.trace_df["num_decode_tokens"].clip(
-            lower=1
-        )
+        trace_df["num_prefill_tokens"] = trace_df["num_prefill_tokens"].clip(lower=1)
+        trace_df["num_decode_tokens"] = trace_df["num_decode_tokens"].clip(lower=1)
 
         # make sure the total does not exceed the max tokens, adjust the prefill tokens if needed
-        total_tokens = (
-            self.trace_df["num_prefill_tokens"] + self.trace_df["num_decode_tokens"]
-        )
+        total_tokens = trace_df["num_prefill_tokens"] + trace_df["num_decode_tokens"]
         diff_tokens = total_tokens - config.max_tokens
         diff_tokens = diff_tokens.clip(lower=0)
-        self.trace_df["num_prefill_tokens"] = (
-            self.trace_df["num_prefill_tokens"] - diff_tokens
-        )
+        trace_df["num_prefill_tokens"] = trace_df["num_prefill_tokens"] - diff_tokens
 
         assert all(
-            self.trace_df["num_prefill_tokens"] + self.trace_df["num_decode_tokens"]
+            trace_df["num_prefill_tokens"] + trace_df["num_decode_tokens"]
             <= config.max_tokens
         )
 
         # rescale the time to change QPS
-        self.trace_df["arrived_at"] = (
-            self.trace_df["arrived_at"] * config.time_scale_factor
+        trace_df["arrived_at"] = trace_df["arrived_at"] * config.time_scale_factor
+
+        return trace_df
+
+    def _iter_trace_chunks(self) -> Iterator[pd.DataFrame]:
+        for trace_df in pd.read_csv(
+            self.config.trace_file, chunksize=self.config.chunk_size
+        ):
+            yield self._process_trace_chunk(trace_df)
+
+    def _prepare_trace_columns(self) -> np.ndarray:
+        trace_columns = np.concatenate(
+            [
+                np.rec.fromarrays(
+                    [
+                        trace_df["arrived_at"].to_numpy(np.float64),
+                        trace_df["num_prefill_tokens"].to_numpy(np.int64),
+                        trace_df["num_decode_tokens"].to_numpy(np.int64),
+                    ],
+                    dtype=TRACE_COLUMNS_DTYPE,
+                )
+                for trace_df in self._iter_trace_chunks()
+            ]
         )
 
-        logger.info(
-            f"Loaded trace file {config.trace_file} with {len(self.trace_df)} requests"
+        # the simulator pulls requests in arrival order, rows with the same
+        # arrival time keep their order in the trace file
+        arrived_at = trace_columns["arrived_at"]
+        if np.any(arrived_at[1:] < arrived_at[:-1]):
+            trace_columns = trace_columns[np.argsort(arrived_at, kind="stable")]
+
+        return trace_columns
+
+    def _load_trace_columns(self) -> np.ndarray:
+        artifact_cache = ArtifactCache(self.config.cache_dir)
+        trace_key = ArtifactCache.get_key(
+            "trace_columns",
+            get_file_digest(self.config.trace_file),
+            self.config.prefill_scale_factor,
+            self.config.decode_scale_factor,
+            self.config.time_scale_factor,
+            self.config.max_tokens,
+            "sorted_by_arrival",
         )
-        # compute pd ratio and log the 25, 50, 75, 90, 95, 99 percentiles
-        pd_ratio = (
-            self.trace_df["num_prefill_tokens"] / self.trace_df["num_decode_tokens"]
-        )
-        logger.debug(
-            f"Prompt/decode token ratio stats\n:{pd_ratio.describe(percentiles=[0.25, 0.5, 0.75, 0.9, 0.95, 0.99])}"
-        )
-
-    def generate_requests(self) -> List[Request]:
-        requests = []
 
-        for _, row in self.trace_df.iterrows():
-            request = Request(
-                arrived_at=row["arrived_at"],
-                num_prefill_tokens=row["num_prefill_tokens"],
-                num_decode_tokens=row["num_decode_tokens"],
+        trace_columns = artifact_cache.load_array(trace_key)
+        if trace_columns is None:
+            logger.info(f"Preparing trace columns for {self.config.trace_file}")
+            trace_name = os.path.splitext(os.path.basename(self.config.trace_file))[0]
+            artifact_cache.store_array(
+                trace_key, f"{trace_name}_trace_columns", self._prepare_trace_columns()
             )
+            trace_columns = artifact_cache.load_array(trace_key)
+
+        return trace_columns
+
+    def _iter_trace_column_chunks(
+        self, trace_columns: np.ndarray
+    ) -> Iterator[np.ndarray]:
+        for start in range(0, len(trace_columns), self.config.chunk_size):
+            yield trace_columns[start : start + self.config.chunk_size]
+
+    def iter_requests(self) -> Iterator[Request]:
+        if self.config.no_cache:
+            trace_columns = self._prepare_trace_columns()
+        else:
+            trace_columns = self._load_trace_columns()
+
+        num_requests = 0
+
+        for trace_chunk in self._iter_trace_column_chunks(trace_columns):
+            for arrived_at, num_prefill_tokens, num_decode_tokens in zip(
+                trace_chunk["arrived_at"].tolist(),
+                trace_chunk["num_prefill_tokens"].tolist(),
+                trace_chunk["num_decode_tokens"].tolist(),
+            ):
+                yield Request(
+                    arrived_at=arrived_at,
+                    num_prefill_tokens=num_prefill_tokens,
+                    num_decode_tokens=num_decode_tokens,
+                )
+            num_requests += len(trace_chunk)
 
-            requests.append(request)
+        logger.info(
+            f"Replayed trace file {self.config.trace_file} with {num_requests} requests"
+        )
 
-        return requests
+    def generate_requests(self) -> List[Request]:
+        return list(self.iter_requests())
@@ -39,6 +39,11 @@ class TraceRequestIntervalGenerator(BaseRequestIntervalGenerator):
             self.trace_df["arrival_time"] * config.time_scale_factor
         )
 
+        # the requests are generated in arrival order
+        self.trace_df = self.trace_df.sort_values(
+            "arrival_time", kind="stable"
+        ).reset_index(drop=True)
+
         # compute the inter-request time
         self.trace_df["inter_request_time"] = self.trace_df["arrival_time"].diff()
 
@@ -3,7 +3,7 @@ from typing import Dict, List, Tuple
 
 from vidur.config import SimulationConfig
 from vidur.entities import Replica, Request
-from vidur.execution_time_predictor import ExecutionTimePredictorRegistry
+from vidur.execution_time_predictor import ExecutionTimePredictorPool
 from vidur.scheduler.replica_scheduler.replica_scheduler_registry import (
     ReplicaSchedulerRegistry,
 )
@@ -18,10 +18,10 @@ class BaseGlobalScheduler(ABC):
 
         self._replica_schedulers = {}
         for replica_id, replica in replicas.items():
-            execution_time_predictor = ExecutionTimePredictorRegistry.get(
-                config.execution_time_predictor_config.get_type(),
+            # replicas with identical hardware share a single predictor
+            execution_time_predictor = ExecutionTimePredictorPool.get(
                 predictor_config=config.execution_time_predictor_config,
-                replica_config=[config.cluster_config.replica_configs[replica_id]],
+                replica_config=config.cluster_config.replica_configs[replica_id],
                 replica_scheduler_config=config.cluster_config.replica_scheduler_config,
                 metrics_config=config.metrics_config,
             )
@@ -51,6 +51,23 @@ class BaseGlobalScheduler(ABC):
             stage_id
         )
 
+    def get_execution_time_cache_stats(self) -> Dict[str, int]:
+        stage_schedulers = [
+            stage_scheduler
+            for replica_scheduler in self._replica_schedulers.values()
+            for stage_scheduler in replica_scheduler._replica_stage_schedulers.values()
+        ]
+        return {
+            "hits": sum(
+                stage_scheduler.execution_time_cache_hits
+                for stage_scheduler in stage_schedulers
+            ),
+            "misses": sum(
+                stage_scheduler.execution_time_cache_misses
+                for stage_scheduler in stage_schedulers
+            ),
+        }
+
     def is_empty(self) -> bool:
         return len(self._request_queue) == 0 and all(
             replica_scheduler.is_empty()
@@ -0,0 +1,72 @@
+from abc import abstractmethod
+from typing import Any, Dict, List, Tuple
+
+from vidur.config import SimulationConfig
+from vidur.entities import Replica, Request
+from vidur.scheduler.global_scheduler.base_global_scheduler import BaseGlobalScheduler
+from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
+    BaseReplicaScheduler,
+)
+from vidur.scheduler.utils.replica_load_index import ReplicaLoadIndex
+
+
+class BaseLORGlobalScheduler(BaseGlobalScheduler):
+    """
+    Base class for the least outstanding requests (LOR) family. Replica loads
+    are kept in an indexed min-heap, replica schedulers report state changes
+    and only those replicas are re-read before each round, so every
+    assignment costs O(log R) instead of a scan over all replicas.
+    """
+
+    def __init__(self, config: SimulationConfig, replicas: Dict[int, Replica]):
+        super().__init__(config, replicas)
+
+        self._load_index = ReplicaLoadIndex()
+        # start with every replica dirty, insertion order decides ties
+        self._dirty_replica_ids = dict.fromkeys(self._replica_schedulers)
+
+        for replica_scheduler in self._replica_schedulers.values():
+            replica_scheduler.set_load_listener(self._on_replica_load_change)
+
+    def _on_replica_load_change(self, replica_id: int) -> None:
+        self._dirty_replica_ids[replica_id] = None
+
+    @abstractmethod
+    def _get_replica_load(self, replica_scheduler: BaseReplicaScheduler) -> Any:
+        pass
+
+    @abstractmethod
+    def _get_assigned_load(
+        self, load: Any, replica_scheduler: BaseReplicaScheduler, request: Request
+    ) -> Any:
+        pass
+
+    def _refresh_loads(self) -> None:
+        for replica_id in self._dirty_replica_ids:
+            self._load_index.update(
+                replica_id,
+                self._get_replica_load(self._replica_schedulers[replica_id]),
+            )
+        self._dirty_replica_ids.clear()
+
+    def schedule(self) -> List[Tuple[int, Request]]:
+        self.sort_requests()
+        self._refresh_loads()
+
+        request_mapping = []
+        for request in self._request_queue:
+            replica_id = self._load_index.get_min()
+            replica_scheduler = self._replica_schedulers[replica_id]
+            self._load_index.update(
+                replica_id,
+                self._get_assigned_load(
+                    self._load_index.get_load(replica_id), replica_scheduler, request
+                ),
+            )
+            request_mapping.append((replica_id, request))
+            # the estimate is replaced by the real state in the next round
+            self._dirty_replica_ids[replica_id] = None
+
+        self._request_queue.clear()
+
+        return request_mapping
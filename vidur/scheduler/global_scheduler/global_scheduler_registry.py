@@ -8,6 +8,8 @@ from vidur.scheduler.global_scheduler.round_robin_global_scheduler import (
 )
 from vidur.scheduler.global_scheduler.lor2_global_scheduler import LOR2GlobalScheduler
 from vidur.scheduler.global_scheduler.lor3_global_scheduler import LOR3GlobalScheduler
+from vidur.scheduler.global_scheduler.lor4_global_scheduler import LOR4GlobalScheduler
+from vidur.scheduler.global_scheduler.lor5_global_scheduler import LOR5GlobalScheduler
 from vidur.types import GlobalSchedulerType
 from vidur.utils.base_registry import BaseRegistry
 
@@ -26,3 +28,5 @@ GlobalSchedulerRegistry.register(GlobalSchedulerType.LOR, LORGlobalScheduler)
 GlobalSchedulerRegistry.register(GlobalSchedulerType.LOR1, LOR1GlobalScheduler)
 GlobalSchedulerRegistry.register(GlobalSchedulerType.LOR2, LOR2GlobalScheduler)
 GlobalSchedulerRegistry.register(GlobalSchedulerType.LOR3, LOR3GlobalScheduler)
+GlobalSchedulerRegistry.register(GlobalSchedulerType.LOR4, LOR4GlobalScheduler)
+GlobalSchedulerRegistry.register(GlobalSchedulerType.LOR5, LOR5GlobalScheduler)
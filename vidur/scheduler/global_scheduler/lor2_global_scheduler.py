@@ -1,31 +1,21 @@
-from typing import List, Tuple
-from math import ceil
-
 from vidur.entities import Request
-from vidur.scheduler.global_scheduler.base_global_scheduler import BaseGlobalScheduler
+from vidur.scheduler.global_scheduler.base_lor_global_scheduler import (
+    BaseLORGlobalScheduler,
+)
+from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
+    BaseReplicaScheduler,
+)
 
 
-class LOR2GlobalScheduler(BaseGlobalScheduler):
+class LOR2GlobalScheduler(BaseLORGlobalScheduler):
     """
     Least outstanding requests (LOR) global scheduler.
     """
 
-    def schedule(self) -> List[Tuple[int, Request]]:
-        self.sort_requests()
-
-        request_mapping = []
-        # 创建内存使用率映射
-        pending_requests_map = {
-            replica_scheduler.replica_id: 
-            replica_scheduler.num_pending_requests+1 / replica_scheduler._flops
-            for replica_scheduler in self._replica_schedulers.values()
-        }
-
-        # using a very simple implementation here, to keep wiring simple
-        while self._request_queue:
-            request = self._request_queue.pop(0)
-            replica_id = min(pending_requests_map.items(), key=lambda x: x[1])[0]
-            pending_requests_map[replica_id] += 1 / self._replica_schedulers[replica_id]._flops  
-            request_mapping.append((replica_id, request))
+    def _get_replica_load(self, replica_scheduler: BaseReplicaScheduler) -> float:
+        return replica_scheduler.num_pending_requests + 1 / replica_scheduler._flops
 
-        return request_mapping
\ No newline at end of file
+    def _get_assigned_load(
+        self, load: float, replica_scheduler: BaseReplicaScheduler, request: Request
+    ) -> float:
+        return load + 1 / replica_scheduler._flops
@@ -1,29 +1,21 @@
-from typing import List, Tuple
-
 from vidur.entities import Request
-from vidur.scheduler.global_scheduler.base_global_scheduler import BaseGlobalScheduler
+from vidur.scheduler.global_scheduler.base_lor_global_scheduler import (
+    BaseLORGlobalScheduler,
+)
+from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
+    BaseReplicaScheduler,
+)
 
 
-class LOR5GlobalScheduler(BaseGlobalScheduler):
+class LOR5GlobalScheduler(BaseLORGlobalScheduler):
     """
     Least outstanding requests (LOR) global scheduler.
     """
 
-    def schedule(self) -> List[Tuple[int, Request]]:
-        self.sort_requests()
-
-        request_mapping = []
-        # keep a map of replica_id -> replica_scheduler
-        # this is used to find the replica with the least outstanding requests
-        pending_requests_map = {
-            replica_scheduler.replica_id: replica_scheduler.num_preempted_requests
-            for replica_scheduler in self._replica_schedulers.values()
-        }
-
-        # using a very simple implementation here, to keep wiring simple
-        while self._request_queue:
-            request = self._request_queue.pop(0)
-            replica_id = min(pending_requests_map.items(), key=lambda x: x[1])[0]
-            request_mapping.append((replica_id, request))
+    def _get_replica_load(self, replica_scheduler: BaseReplicaScheduler) -> int:
+        return replica_scheduler.num_preempted_requests
 
-        return request_mapping
+    def _get_assigned_load(
+        self, load: int, replica_scheduler: BaseReplicaScheduler, request: Request
+    ) -> int:
+        return load
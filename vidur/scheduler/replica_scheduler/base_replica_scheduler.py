@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List
+from collections import deque
+from typing import Callable, List, Optional
 
 from vidur.config import (
     BaseReplicaSchedulerConfig,
@@ -52,9 +53,11 @@ class BaseReplicaScheduler(ABC):
             f"Obtained max batch size of {self._max_batch_size} for replica {self._replica_id}"
         )
 
-        self._request_queue = []
+        self._request_queue = deque()
+        self._preempted_requests = deque()
         self._num_allocated_blocks = 0
         self._allocation_map = {}
+        self._load_listener: Optional[Callable[[int], None]] = None
 
         self._replica_stage_schedulers = {
             stage_id: ReplicaStageScheduler(
@@ -62,6 +65,7 @@ class BaseReplicaScheduler(ABC):
                 stage_id,
                 stage_id == num_stages - 1,
                 execution_time_predictor,
+                self._config.execution_time_cache_size,
             )
             for stage_id in range(num_stages)
         }
@@ -70,6 +74,10 @@ class BaseReplicaScheduler(ABC):
     def num_pending_requests(self) -> int:
         return len(self._request_queue)
 
+    @property
+    def num_preempted_requests(self) -> int:
+        return len(self._preempted_requests)
+
     @property
     def replica_id(self) -> int:
         return self._replica_id
@@ -100,8 +108,17 @@ class BaseReplicaScheduler(ABC):
 
         return request.num_prefill_tokens
 
+    def set_load_listener(self, load_listener: Callable[[int], None]) -> None:
+        # called with the replica id whenever the queue or memory state changes
+        self._load_listener = load_listener
+
+    def _notify_load_change(self) -> None:
+        if self._load_listener is not None:
+            self._load_listener(self._replica_id)
+
     def add_request(self, request: Request) -> None:
         self._request_queue.append(request)
+        self._notify_load_change()
 
     def get_replica_stage_scheduler(self, stage_id: int):
         return self._replica_stage_schedulers[stage_id]
@@ -117,6 +134,7 @@ class BaseReplicaScheduler(ABC):
             self._allocation_map[request_id] += num_blocks
 
         assert self._num_allocated_blocks <= self._config.num_blocks
+        self._notify_load_change()
 
     def free(self, *request_ids: List[int]) -> None:
         for request_id in request_ids:
@@ -124,6 +142,7 @@ class BaseReplicaScheduler(ABC):
             self._num_allocated_blocks -= num_blocks
 
         assert self._num_allocated_blocks >= 0
+        self._notify_load_change()
 
     def free_batch(self, batch: Batch) -> None:
         self.free(*batch.request_ids)
@@ -144,4 +163,5 @@ class BaseReplicaScheduler(ABC):
                 break
             scheduled_batches.append(batch)
             self._num_running_batches += 1
+        self._notify_load_change()
         return scheduled_batches
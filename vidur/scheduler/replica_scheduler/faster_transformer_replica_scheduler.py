@@ -1,3 +1,5 @@
+from collections import deque
+
 from vidur.entities.batch import Batch
 from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
     BaseReplicaScheduler,
@@ -8,7 +10,7 @@ class FasterTransformerReplicaScheduler(BaseReplicaScheduler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._preempted_batches = []
+        self._preempted_batches = deque()
         self._num_running_batches = 0
         self._pending_free_map = {}
 
@@ -22,6 +24,8 @@ class FasterTransformerReplicaScheduler(BaseReplicaScheduler):
         else:
             self._preempted_batches.append(batch)
 
+        self._notify_load_change()
+
     def _generate_next_batch_from_preempted(self, preempted_batch: Batch) -> Batch:
         requests = []
         num_tokens = []
@@ -40,7 +44,7 @@ class FasterTransformerReplicaScheduler(BaseReplicaScheduler):
 
     def _get_next_batch(self) -> Batch:
         if self._preempted_batches:
-            preempted_batch = self._preempted_batches.pop(0)
+            preempted_batch = self._preempted_batches.popleft()
             return self._generate_next_batch_from_preempted(preempted_batch)
 
         requests = []
@@ -53,7 +57,7 @@ class FasterTransformerReplicaScheduler(BaseReplicaScheduler):
             if not self.can_allocate(self._max_blocks_per_sequence):
                 break
 
-            request = self._request_queue.pop(0)
+            request = self._request_queue.popleft()
             self.allocate(request.id, self._max_blocks_per_sequence)
             next_num_tokens = self._get_request_next_num_tokens(request)
             requests.append(request)
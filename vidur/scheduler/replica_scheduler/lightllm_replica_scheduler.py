@@ -1,4 +1,5 @@
-from typing import List, Tuple
+from collections import deque
+from typing import Deque, Tuple
 
 import numpy as np
 
@@ -12,7 +13,7 @@ class LightLLMReplicaScheduler(BaseReplicaScheduler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._preempted_requests: List[Request] = []
+        self._preempted_requests: Deque[Request] = deque()
         self._num_running_batches = 0
         self._max_micro_batch_size = self._config.batch_size_cap // self._num_stages
         assert (
@@ -34,6 +35,8 @@ class LightLLMReplicaScheduler(BaseReplicaScheduler):
             else:
                 self._preempted_requests.append(request)
 
+        self._notify_load_change()
+
     def _get_tuple_tokens(self, request: Request) -> Tuple[int, int]:
         if request.scheduled:
             num_processed_tokens = request.num_processed_tokens
@@ -96,7 +99,7 @@ class LightLLMReplicaScheduler(BaseReplicaScheduler):
             if not self._can_allocate_request(request):
                 break
 
-            request = self._request_queue.pop(0)
+            request = self._request_queue.popleft()
 
             self._allocate_request(request)
             requests.append(request)
@@ -116,7 +119,7 @@ class LightLLMReplicaScheduler(BaseReplicaScheduler):
         while self._preempted_requests:
             assert len(requests) < self._max_micro_batch_size
 
-            request = self._preempted_requests.pop(0)
+            request = self._preempted_requests.popleft()
 
             assert self.can_allocate(1)
             self._allocate_request(request)
@@ -1,3 +1,5 @@
+from collections import deque
+
 from vidur.entities.batch import Batch
 from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
     BaseReplicaScheduler,
@@ -8,7 +10,7 @@ class OrcaReplicaScheduler(BaseReplicaScheduler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._preempted_requests = []
+        self._preempted_requests = deque()
         self._num_running_batches = 0
 
     def on_batch_end(self, batch: Batch) -> None:
@@ -20,6 +22,8 @@ class OrcaReplicaScheduler(BaseReplicaScheduler):
             else:
                 self._preempted_requests.append(request)
 
+        self._notify_load_change()
+
     def _get_next_batch(self) -> Batch:
         requests = []
         num_tokens = []
@@ -29,7 +33,7 @@ class OrcaReplicaScheduler(BaseReplicaScheduler):
             if len(requests) == self._max_batch_size:
                 break
 
-            request = self._preempted_requests.pop(0)
+            request = self._preempted_requests.popleft()
             next_num_tokens = self._get_request_next_num_tokens(request)
             requests.append(request)
             num_tokens.append(next_num_tokens)
@@ -41,7 +45,7 @@ class OrcaReplicaScheduler(BaseReplicaScheduler):
             if not self.can_allocate(self._max_blocks_per_sequence):
                 break
 
-            request = self._request_queue.pop(0)
+            request = self._request_queue.popleft()
 
             self.allocate(request.id, self._max_blocks_per_sequence)
             next_num_tokens = self._get_request_next_num_tokens(request)
@@ -4,6 +4,7 @@ from vidur.entities.batch import Batch, Request
 from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
     BaseReplicaScheduler,
 )
+from vidur.scheduler.utils.preempted_request_queue import PreemptedRequestQueue
 
 
 class SarathiReplicaScheduler(BaseReplicaScheduler):
@@ -12,7 +13,7 @@ class SarathiReplicaScheduler(BaseReplicaScheduler):
 
         # sarathi config
         self._num_running_batches = 0
-        self._preempted_requests = []
+        self._preempted_requests = PreemptedRequestQueue()
         # For vLLM and its derivatives, we only need to set a loose max batch size
         # Memory requirements are handled explicitly by the scheduler
         self._max_micro_batch_size = self._config.batch_size_cap // self._num_stages
@@ -66,6 +67,8 @@ class SarathiReplicaScheduler(BaseReplicaScheduler):
             else:
                 self._preempted_requests.append(request)
 
+        self._notify_load_change()
+
     def _get_request_next_num_tokens(
         self, request: Request, batch_contains_prefill: bool, num_batch_tokens: int
     ) -> int:
@@ -97,7 +100,7 @@ class SarathiReplicaScheduler(BaseReplicaScheduler):
             if len(requests) == self._max_micro_batch_size:
                 break
 
-            request = self._preempted_requests.pop(0)
+            request = self._preempted_requests.popleft()
 
             if not request.is_prefill_complete:
                 running_prefills.append(request)
@@ -113,14 +116,14 @@ class SarathiReplicaScheduler(BaseReplicaScheduler):
 
             while not self._can_allocate_request(request):
                 if self._preempted_requests:
-                    victim_request = self._preempted_requests.pop(-1)
+                    victim_request = self._preempted_requests.pop()
                     victim_request.restart()
                     self.free(victim_request.id)
-                    self._request_queue = [victim_request] + self._request_queue
+                    self._request_queue.appendleft(victim_request)
                 else:
                     request.restart()
                     self.free(request.id)
-                    self._request_queue = [request] + self._request_queue
+                    self._request_queue.appendleft(request)
                     break
             else:
                 self._allocate_request(request)
@@ -147,10 +150,7 @@ class SarathiReplicaScheduler(BaseReplicaScheduler):
 
         # re-add the skipped requests, but make sure that we add them to the
         # front of the queue so that they are scheduled first and we maintain FIFO ordering
-        self._preempted_requests = skipped_requests + self._preempted_requests
-        self._preempted_requests = sorted(
-            self._preempted_requests, key=lambda req: req.arrived_at
-        )
+        self._preempted_requests.sort(skipped_requests)
         skipped_requests = []
 
         while self._request_queue:
@@ -170,7 +170,7 @@ class SarathiReplicaScheduler(BaseReplicaScheduler):
             if next_num_tokens == 0:
                 break
 
-            request = self._request_queue.pop(0)
+            request = self._request_queue.popleft()
 
             self._allocate_request(request)
 
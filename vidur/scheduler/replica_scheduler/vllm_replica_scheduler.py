@@ -1,17 +1,17 @@
 from math import ceil
-from typing import List
 
 from vidur.entities.batch import Batch, Request
 from vidur.scheduler.replica_scheduler.base_replica_scheduler import (
     BaseReplicaScheduler,
 )
+from vidur.scheduler.utils.preempted_request_queue import PreemptedRequestQueue
 
 
 class VLLMReplicaScheduler(BaseReplicaScheduler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._preempted_requests: List[Request] = []
+        self._preempted_requests = PreemptedRequestQueue()
         self._num_running_batches = 0
         # For vLLM and its derivatives, we only need to set a loose max batch size
         # Memory requirements are handled explicitly by the scheduler
@@ -28,6 +28,8 @@ class VLLMReplicaScheduler(BaseReplicaScheduler):
                 self.free(request.id)
             else:
                 self._preempted_requests.append(request)
+
+        self._notify_load_change()
 #update the preempted_requests
     def _can_allocate_request(self, request: Request) -> bool:
         if request.id not in self._allocation_map:
@@ -89,7 +91,7 @@ class VLLMReplicaScheduler(BaseReplicaScheduler):
             if len(requests) == self._max_micro_batch_size:
                 break
 
-            request = self._request_queue.pop(0)
+            request = self._request_queue.popleft()
 
             self._allocate_request(request)
             requests.append(request)
@@ -100,24 +102,24 @@ class VLLMReplicaScheduler(BaseReplicaScheduler):
             return Batch(self._replica_id, requests, num_tokens)
 
         # Safer to sort preempted_requests to maintain FIFO order
-        self._preempted_requests.sort(key=lambda r: r.arrived_at)
+        self._preempted_requests.sort()
         # all preempted_requests will have prefill completed
         while self._preempted_requests:
             if len(requests) == self._max_micro_batch_size:
                 break
 
-            request = self._preempted_requests.pop(0)
+            request = self._preempted_requests.popleft()
 
             while not self._can_allocate_request(request):
                 if self._preempted_requests:
-                    victim_request = self._preempted_requests.pop(-1)
+                    victim_request = self._preempted_requests.pop()
                     victim_request.restart()
                     self.free(victim_request.id)
-                    self._request_queue = [victim_request] + self._request_queue
+                    self._request_queue.appendleft(victim_request)
                 else:
                     request.restart()
                     self.free(request.id)
-                    self._request_queue = [request] + self._request_queue
+                    self._request_queue.appendleft(request)
                     break
             else:
                 self._allocate_request(request)
@@ -1,3 +1,4 @@
+from collections import OrderedDict, deque
 from typing import Tuple
 
 from vidur.entities import Batch, BatchStage, ExecutionTime
@@ -11,19 +12,34 @@ class ReplicaStageScheduler:
         stage_id: int,
         is_last_stage: bool,
         execution_time_predictor: BaseExecutionTimePredictor,
+        execution_time_cache_size: int = 0,
     ) -> None:
         self._replica_id = replica_id
         self._stage_id = stage_id
         self._is_last_stage = is_last_stage
         self._execution_time_predictor = execution_time_predictor
 
-        self._batch_queue = []
+        self._batch_queue = deque()
         self._is_busy = False
 
+        # LRU cache of execution times keyed on the batch signature
+        self._execution_time_cache = OrderedDict()
+        self._execution_time_cache_size = execution_time_cache_size
+        self._execution_time_cache_hits = 0
+        self._execution_time_cache_misses = 0
+
     @property
     def is_last_stage(self) -> bool:
         return self._is_last_stage
 
+    @property
+    def execution_time_cache_hits(self) -> int:
+        return self._execution_time_cache_hits
+
+    @property
+    def execution_time_cache_misses(self) -> int:
+        return self._execution_time_cache_misses
+
     def is_empty(self) -> bool:
         return len(self._batch_queue) == 0
 
@@ -38,11 +54,8 @@ class ReplicaStageScheduler:
             return None, None, None
 
         self._is_busy = True
-        batch = self._batch_queue.pop(0)
-        execution_time = self._execution_time_predictor.get_execution_time(
-            batch,
-            self._stage_id,
-        )
+        batch = self._batch_queue.popleft()
+        execution_time = self._get_execution_time(batch)
         total_execution_time = execution_time.total_time
         model_execution_time = execution_time.model_time
         batch_stage = BatchStage(
@@ -53,6 +66,41 @@ class ReplicaStageScheduler:
             model_execution_time,
             batch.requests,
             batch.num_tokens,
+            batch.num_tokens_array,
+            batch.num_processed_tokens_array,
         )
 
         return batch, batch_stage, execution_time
+
+    def _get_execution_time(self, batch: Batch) -> ExecutionTime:
+        if not self._execution_time_cache_size:
+            return self._execution_time_predictor.get_execution_time(
+                batch,
+                self._stage_id,
+            )
+
+        signature = self._execution_time_predictor.get_batch_signature(
+            batch, self._stage_id
+        )
+        if signature is None:
+            return self._execution_time_predictor.get_execution_time(
+                batch,
+                self._stage_id,
+            )
+
+        execution_time = self._execution_time_cache.get(signature)
+        if execution_time is not None:
+            self._execution_time_cache_hits += 1
+            self._execution_time_cache.move_to_end(signature)
+            return execution_time
+
+        self._execution_time_cache_misses += 1
+        execution_time = self._execution_time_predictor.get_execution_time(
+            batch,
+            self._stage_id,
+        )
+        self._execution_time_cache[signature] = execution_time
+        if len(self._execution_time_cache) > self._execution_time_cache_size:
+            self._execution_time_cache.popitem(last=False)
+
+        return execution_time
@@ -0,0 +1,104 @@
+from collections import deque
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Optional
+
+from vidur.entities import Request
+
+
+class PreemptedRequestQueue:
+    """
+    Preempted requests ordered the way the list based schedulers kept them: an
+    arrival ordered part followed by the requests appended since the last
+    `sort`. A stable sort by arrival time of that list is the (arrived_at, seq)
+    order for a per append sequence number, so the ordered part is kept in a
+    pair of heaps with lazy deletion and both ends pop in O(log n) instead of
+    re-sorting and shifting a list on every batch.
+    """
+
+    def __init__(self) -> None:
+        # entries are (arrived_at, seq, entry_id, request), the max heap
+        # negates the first two fields
+        self._min_heap = []
+        self._max_heap = []
+        # entry ids popped from one heap that are still present in the other
+        self._removed_entry_ids = set()
+        self._num_sorted = 0
+        self._next_entry_id = 0
+
+        self._appended = deque()
+        self._next_seq = 0
+        # seqs of the requests popped since the last `sort`, so that requests
+        # handed back to `sort` keep their position among equal arrivals
+        self._popped_seqs: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._num_sorted + len(self._appended)
+
+    def append(self, request: Request) -> None:
+        self._appended.append((self._next_seq, request))
+        self._next_seq += 1
+
+    def popleft(self) -> Request:
+        if self._num_sorted:
+            _, seq, entry_id, request = self._pop_heap(self._min_heap)
+            self._removed_entry_ids.add(entry_id)
+            self._num_sorted -= 1
+        else:
+            seq, request = self._appended.popleft()
+
+        self._popped_seqs[request.id] = seq
+        return request
+
+    def pop(self) -> Request:
+        if self._appended:
+            seq, request = self._appended.pop()
+        else:
+            _, negated_seq, entry_id, request = self._pop_heap(self._max_heap)
+            seq = -negated_seq
+            self._removed_entry_ids.add(entry_id)
+            self._num_sorted -= 1
+
+        self._popped_seqs[request.id] = seq
+        return request
+
+    def sort(self, requests: Optional[List[Request]] = None) -> None:
+        """
+        Moves the appended requests, and the given requests popped since the
+        last call, into the arrival ordered part.
+        """
+        for request in requests or []:
+            self._push_sorted(self._popped_seqs[request.id], request)
+
+        while self._appended:
+            self._push_sorted(*self._appended.popleft())
+
+        self._popped_seqs.clear()
+
+        # drop stale entries once they dominate the heaps
+        if len(self._removed_entry_ids) > self._num_sorted:
+            self._min_heap = [
+                entry
+                for entry in self._min_heap
+                if entry[2] not in self._removed_entry_ids
+            ]
+            self._max_heap = [
+                entry
+                for entry in self._max_heap
+                if entry[2] not in self._removed_entry_ids
+            ]
+            heapify(self._min_heap)
+            heapify(self._max_heap)
+            self._removed_entry_ids.clear()
+
+    def _push_sorted(self, seq: int, request: Request) -> None:
+        entry_id = self._next_entry_id
+        self._next_entry_id += 1
+
+        heappush(self._min_heap, (request.arrived_at, seq, entry_id, request))
+        heappush(self._max_heap, (-request.arrived_at, -seq, entry_id, request))
+        self._num_sorted += 1
+
+    def _pop_heap(self, heap: list) -> tuple:
+        while heap[0][2] in self._removed_entry_ids:
+            self._removed_entry_ids.remove(heappop(heap)[2])
+        return heappop(heap)
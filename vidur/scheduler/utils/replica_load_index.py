@@ -0,0 +1,71 @@
+from typing import Any, Dict, List
+
+
+class ReplicaLoadIndex:
+    """
+    Indexed binary min-heap over replica loads. Loads can be any comparable
+    value and can be updated in place in O(log R). Ties go to the replica that
+    was added first, which matches `min` over a dict of replicas.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._loads: Dict[int, Any] = {}
+        self._orders: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def get_min(self) -> int:
+        return self._heap[0]
+
+    def get_load(self, replica_id: int) -> Any:
+        return self._loads[replica_id]
+
+    def update(self, replica_id: int, load: Any) -> None:
+        if replica_id not in self._positions:
+            self._orders[replica_id] = len(self._orders)
+            self._loads[replica_id] = load
+            self._positions[replica_id] = len(self._heap)
+            self._heap.append(replica_id)
+            self._sift_up(len(self._heap) - 1)
+            return
+
+        self._loads[replica_id] = load
+        position = self._positions[replica_id]
+        self._sift_up(position)
+        self._sift_down(self._positions[replica_id])
+
+    def _less(self, replica_id: int, other_replica_id: int) -> bool:
+        load = self._loads[replica_id]
+        other_load = self._loads[other_replica_id]
+        if load == other_load:
+            return self._orders[replica_id] < self._orders[other_replica_id]
+        return load < other_load
+
+    def _swap(self, i: int, j: int) -> None:
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._positions[heap[i]] = i
+        self._positions[heap[j]] = j
+
+    def _sift_up(self, position: int) -> None:
+        while position > 0:
+            parent = (position - 1) >> 1
+            if not self._less(self._heap[position], self._heap[parent]):
+                break
+            self._swap(position, parent)
+            position = parent
+
+    def _sift_down(self, position: int) -> None:
+        size = len(self._heap)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self._less(self._heap[child], self._heap[smallest]):
+                    smallest = child
+            if smallest == position:
+                break
+            self._swap(position, smallest)
+            position = smallest
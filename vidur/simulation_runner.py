@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from vidur.config import SimulationConfig
+from vidur.entities.base_entity import BaseEntity
+from vidur.events import BaseEvent
+from vidur.metrics.cdf_sketch import get_quantile_key
+from vidur.metrics.metrics_store import SUMMARY_QUANTILES
+from vidur.simulator import Simulator
+from vidur.utils.random import set_seeds
+
+
+@dataclass
+class SummaryResult:
+    output_dir: str
+    num_requests: int
+    # simulated time at which the run ended, in seconds
+    time: float
+    # metric name -> count, mean, min, max and quantiles, as in summary.json
+    metrics: Dict[str, Dict[str, float]]
+    # True if the SLOs were met and False if violated, None when no verdict
+    # was reached while the simulation ran
+    slo_verdict: Optional[bool] = None
+
+    def get_quantile(self, metric_name: str, quantile: float) -> Optional[float]:
+        return self.metrics.get(metric_name, {}).get(get_quantile_key(quantile))
+
+
+def run_simulation(
+    config: SimulationConfig,
+    write_output: bool = True,
+    quantiles: Optional[List[float]] = None,
+) -> SummaryResult:
+    """
+    Runs a simulation in the calling process. Execution time predictors and
+    cached traces are shared with the earlier runs of the process, so only the
+    first run pays for loading them. Without `write_output` only summary.json
+    is written. `quantiles` are added to the default summary quantiles.
+    """
+    set_seeds(config.seed)
+    BaseEntity.reset_id_counters()
+    BaseEvent.reset_id_counter()
+
+    simulator = Simulator(config)
+    simulator.run()
+
+    if write_output:
+        simulator.write_output()
+
+    metrics = simulator.metric_store.store_summary(
+        sorted(set(SUMMARY_QUANTILES + (quantiles or [])))
+    )
+
+    return SummaryResult(
+        output_dir=config.metrics_config.output_dir,
+        num_requests=simulator.num_requests,
+        time=simulator.time,
+        metrics=metrics or {},
+        slo_verdict=simulator.metric_store.slo_verdict,
+    )
@@ -1,15 +1,16 @@
-import atexit
-import heapq
 import json
 from typing import List
 
 from vidur.config import SimulationConfig
 from vidur.entities import Cluster
+from vidur.event_queue import EventQueueRegistry
 from vidur.events import BaseEvent, RequestArrivalEvent
+from vidur.events.global_schedule_event import GlobalScheduleEvent
 from vidur.logger import init_logger
 from vidur.metrics import MetricsStore
 from vidur.request_generator import RequestGeneratorRegistry
 from vidur.scheduler import BaseGlobalScheduler, GlobalSchedulerRegistry
+from vidur.types import EventType
 
 logger = init_logger(__name__)
 
@@ -24,7 +25,21 @@ class Simulator:
         if not self._time_limit:
             self._time_limit = float("inf")
 
-        self._event_queue = []
+        self._event_queue = EventQueueRegistry.get_from_str(
+            self._config.event_queue_type
+        )
+
+        self._coalesce_schedule_events = self._config.coalesce_schedule_events
+        self._schedule_quantum = self._config.schedule_quantum
+        if self._schedule_quantum < 0:
+            raise ValueError(
+                f"Schedule quantum must be non-negative, got {self._schedule_quantum}"
+            )
+        # schedule events that are in the event queue and not handled yet
+        self._has_pending_global_schedule = False
+        self._pending_replica_schedules = set()
+
+        self._early_stop_on_slo = self._config.slo_config.early_stop
 
         self._event_trace = []
         self._event_chrome_trace = []
@@ -46,7 +61,6 @@ class Simulator:
         )
 
         self._init_event_queue()
-        atexit.register(self._write_output)
 
     @property
     def scheduler(self) -> BaseGlobalScheduler:
@@ -56,17 +70,36 @@ class Simulator:
     def metric_store(self) -> MetricsStore:
         return self._metric_store
 
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @property
+    def num_requests(self) -> int:
+        return self._num_requests
+
     def run(self) -> None:
-        logger.info(
-            f"Starting simulation with cluster: {self._cluster} and {len(self._event_queue)} requests"
-        )
+        logger.info(f"Starting simulation with cluster: {self._cluster}")
 
         while self._event_queue and not self._terminate:
-            _, event = heapq.heappop(self._event_queue) #using heapq to figure out the next event
+            event = self._event_queue.pop()
             self._set_time(event._time)
+            if self._coalesce_schedule_events:
+                self._on_schedule_event_pop(event)
+            if event._event_type == EventType.REQUEST_ARRIVAL:
+                # pull the next arrival before handling this one so that it is
+                # ordered ahead of the events created by the handler
+                self._add_next_request_arrival()
             new_events = event.handle_event(self._scheduler, self._metric_store)
             self._add_events(new_events)
 
+            if self._early_stop_on_slo and self._metric_store.slo_verdict is not None:
+                logger.info(
+                    f"SLO {'met' if self._metric_store.slo_verdict else 'violated'} "
+                    f"at {self._time}s, terminating the simulation."
+                )
+                self._terminate = True
+
             if self._config.metrics_config.write_json_trace:
                 self._event_trace.append(event.to_dict())
 
@@ -77,11 +110,17 @@ class Simulator:
 
         assert self._scheduler.is_empty() or self._terminate
 
-        logger.info(f"Simulation ended at: {self._time}s")
+        logger.info(
+            f"Simulation ended at: {self._time}s after {self._num_requests} requests"
+        )
 
-    def _write_output(self) -> None:
+    def write_output(self) -> None:
         logger.info("Writing output")
 
+        execution_time_cache_stats = self._scheduler.get_execution_time_cache_stats()
+        self._metric_store.store_execution_time_cache_stats(
+            execution_time_cache_stats["hits"], execution_time_cache_stats["misses"]
+        )
         self._metric_store.plot()
         logger.info("Metrics written")
 
@@ -94,17 +133,68 @@ class Simulator:
             logger.info("Chrome event trace written")
 
     def _add_event(self, event: BaseEvent) -> None:
-        heapq.heappush(self._event_queue, (event._priority_number, event))
+        self._event_queue.push(event)
 
     def _add_events(self, events: List[BaseEvent]) -> None:
+        if self._coalesce_schedule_events:
+            events = self._coalesce_events(events)
+
         for event in events:
             self._add_event(event)
 
+    def _on_schedule_event_pop(self, event: BaseEvent) -> None:
+        if event._event_type == EventType.GLOBAL_SCHEDULE:
+            self._has_pending_global_schedule = False
+        elif event._event_type == EventType.REPLICA_SCHEDULE:
+            self._pending_replica_schedules.discard((event._time, event._replica_id))
+
+    def _coalesce_events(self, events: List[BaseEvent]) -> List[BaseEvent]:
+        coalesced_events = []
+
+        for event in events:
+            if event._event_type == EventType.GLOBAL_SCHEDULE:
+                # a pending pass is at or after this arrival and drains it too
+                if self._has_pending_global_schedule:
+                    continue
+                self._has_pending_global_schedule = True
+                if self._schedule_quantum:
+                    event = GlobalScheduleEvent(event._time + self._schedule_quantum)
+            elif event._event_type == EventType.REPLICA_SCHEDULE:
+                # every later state change emits its own replica schedule event
+                # once the pending one has been handled
+                key = (event._time, event._replica_id)
+                if key in self._pending_replica_schedules:
+                    continue
+                self._pending_replica_schedules.add(key)
+
+            coalesced_events.append(event)
+
+        return coalesced_events
+
     def _init_event_queue(self) -> None:
-        requests = self._request_generator.generate()
+        # only the next request arrival is kept in the event queue, the
+        # following one is pulled from the generator when it fires
+        self._request_iterator = self._request_generator.iter_requests()
+        self._last_arrived_at = 0
+        self._num_requests = 0
+        self._add_next_request_arrival()
+
+    def _add_next_request_arrival(self) -> None:
+        request = next(self._request_iterator, None)
+        if request is None:
+            self._metric_store.on_all_requests_arrived(self._num_requests)
+            return
+
+        if request.arrived_at < self._last_arrived_at:
+            raise ValueError(
+                f"Request {request.id} arrives at {request.arrived_at}s, before the "
+                f"previous request at {self._last_arrived_at}s. Requests must be "
+                "generated in order of arrival time."
+            )
 
-        for request in requests:
-            self._add_event(RequestArrivalEvent(request.arrived_at, request))
+        self._last_arrived_at = request.arrived_at
+        self._num_requests += 1
+        self._add_event(RequestArrivalEvent(request.arrived_at, request))
 
     def _set_time(self, time: float) -> None:
         self._time = time
@@ -0,0 +1,5 @@
+from vidur.types.base_int_enum import BaseIntEnum
+
+
+class EventQueueType(BaseIntEnum):
+    HEAP = 1
@@ -8,3 +8,5 @@ class GlobalSchedulerType(BaseIntEnum):
     LOR1 = 4
     LOR2 = 5
     LOR3 = 6
+    LOR4 = 7
+    LOR5 = 8
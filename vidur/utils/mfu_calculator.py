@@ -1,3 +1,7 @@
+from typing import List
+
+import numpy as np
+
 from vidur.config import ReplicaConfig
 from vidur.entities import BatchStage
 from vidur.utils.param_counter import ParamCounter
@@ -21,22 +25,52 @@ class MFUCalculator:
         self._device_flops = replica_config.device_config.fp16_tflops * 2**40
 
     def _get_mlp_flops(self, batch_stage: BatchStage) -> float:
-        num_tokens = sum(batch_stage.num_tokens)
+        num_tokens = int(batch_stage.num_tokens_array.sum())
         return 2 * num_tokens * self._num_params_per_device
 
     def _get_attention_flops(self, batch_stage: BatchStage) -> float:
-        total_flops = 0
-        for request, num_tokens in zip(batch_stage.requests, batch_stage.num_tokens):
-            total_flops += (
-                4  # for number of ops in attention
-                * self._num_layers_per_device
-                * self._num_heads_per_device
-                * self._head_dimension
-                * num_tokens  # q length
-                * (num_tokens + request.num_processed_tokens)  # kv length
-            )
-
-        return total_flops
+        q_lengths = batch_stage.num_tokens_array
+        kv_lengths = q_lengths + batch_stage.num_processed_tokens_array
+
+        return (
+            4  # for number of ops in attention
+            * self._num_layers_per_device
+            * self._num_heads_per_device
+            * self._head_dimension
+            * int(np.dot(q_lengths, kv_lengths))
+        )
+
+    def get_mfus(self, batch_stages: List[BatchStage]) -> np.ndarray:
+        """
+        Same as get_mfu for many batch stages at once, the token counts of all
+        stages are concatenated and reduced per stage.
+        """
+        q_lengths = np.concatenate(
+            [batch_stage.num_tokens_array for batch_stage in batch_stages]
+        )
+        kv_lengths = q_lengths + np.concatenate(
+            [batch_stage.num_processed_tokens_array for batch_stage in batch_stages]
+        )
+        stage_sizes = [
+            len(batch_stage.num_tokens_array) for batch_stage in batch_stages
+        ]
+        stage_offsets = np.cumsum([0] + stage_sizes[:-1])
+        execution_times = np.array(
+            [batch_stage.execution_time for batch_stage in batch_stages]
+        )
+
+        num_tokens = np.add.reduceat(q_lengths, stage_offsets)
+        mlp_flops = 2 * num_tokens * self._num_params_per_device
+        attention_flops = (
+            4
+            * self._num_layers_per_device
+            * self._num_heads_per_device
+            * self._head_dimension
+            * np.add.reduceat(q_lengths * kv_lengths, stage_offsets)
+        )
+        total_flops = mlp_flops + attention_flops
+        total_flops_per_second = total_flops / execution_times
+        return total_flops_per_second * 100 / self._device_flops
 
     def get_mfu(self, batch_stage: BatchStage) -> float:
         mlp_flops = self._get_mlp_flops(batch_stage)